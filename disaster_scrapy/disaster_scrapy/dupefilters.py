@@ -0,0 +1,187 @@
+# AGRN-keyed request deduplication that persists across runs
+#
+# Detail requests (those carrying meta['agrn']) are keyed by AGRN, so the
+# same disaster linked from two listing pages is fetched once. Every other
+# request is keyed by its canonical URL, which collapses the "Next" link and
+# the ?page= request for the same listing page.
+#
+# A redirect hop keeps the original meta, so it is keyed by its URL instead;
+# keying it by AGRN again would filter it as a duplicate of itself.
+#
+# Finished disasters are also saved to a compact on-disk table of sorted 64-bit
+# AGRN key hashes with fetch timestamps, one file per spider under the project
+# data dir (.scrapy/dupefilter/). A disaster counts as finished only once its
+# item has been scraped and saved without error (item_scraped, minus any
+# item_save_failed). On the next run it is suppressed until its TTL runs out.
+#
+# Listing and other pages are deduped within the run only: they are how the
+# next run reaches disasters that failed or were never linked, so a re-run
+# always walks the full pagination and skips just the finished AGRNs.
+#
+#   DUPEFILTER_AGRN_TTL  seconds before a disaster page is refetched
+#   DUPEFILTER_PERSIST   False to dedupe within the run only (forces a full refresh)
+#
+# Suppressed requests are counted in the dupefilter/suppressed/* stats.
+import hashlib
+import logging
+import os
+import time
+from array import array
+
+from scrapy import signals
+from scrapy.dupefilters import BaseDupeFilter
+from scrapy.exceptions import NotConfigured
+from scrapy.utils.project import data_path
+from w3lib.url import canonicalize_url
+
+from disaster_scrapy.signals import item_save_failed
+
+
+logger = logging.getLogger(__name__)
+
+
+def agrn_key(agrn):
+    """Normalize '1,234', '1234' or 'AGRN-1234' to 'AGRN-1234'"""
+    return f"AGRN-{str(agrn).replace(',', '').replace('AGRN-', '')}"
+
+
+def request_key(request):
+    """Return (kind, key) identifying the page a request fetches"""
+    agrn = request.meta.get('agrn')
+    if agrn and not request.meta.get('redirect_urls'):
+        return 'agrn', agrn_key(agrn)
+    return 'page', canonicalize_url(request.url)
+
+
+def key_hash(kind, key):
+    return int.from_bytes(hashlib.blake2b(f"{kind}:{key}".encode(), digest_size=8).digest(), 'little')
+
+
+class SeenStore:
+    """Sorted on-disk table of (64-bit key hash, fetch time) pairs"""
+
+    def __init__(self, path):
+        self.path = path
+
+    def load(self):
+        hashes, stamps = array('Q'), array('I')
+        if not os.path.exists(self.path):
+            return {}
+        with open(self.path, 'rb') as f:
+            count = int.from_bytes(f.read(4), 'little')
+            hashes.fromfile(f, count)
+            stamps.fromfile(f, count)
+        return dict(zip(hashes, stamps))
+
+    def save(self, seen):
+        hashes = array('Q', sorted(seen))
+        stamps = array('I', (seen[h] for h in hashes))
+
+        # Write then rename so a crash never leaves a half-written table
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(len(hashes).to_bytes(4, 'little'))
+            hashes.tofile(f)
+            stamps.tofile(f)
+        os.replace(tmp_path, self.path)
+
+
+class PersistentDupeFilter(BaseDupeFilter):
+    """Dedupe requests by AGRN or canonical URL, within and across runs"""
+
+    def __init__(self, crawler, agrn_ttl=6 * 3600, persist=True, debug=False):
+        self.crawler = crawler
+        self.agrn_ttl = agrn_ttl
+        self.persist = persist
+        self.debug = debug
+        self.logdupes = True
+        self.seen_this_run = set()
+        self.previous = {}  # key hash -> fetch time from earlier runs
+        self.fetched = {}  # AGRN key hash -> fetch time for disasters finished this run
+        self.failed = set()  # AGRN key hashes whose save failed this run
+        self.store = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        dupefilter = cls(
+            crawler,
+            agrn_ttl=settings.getint('DUPEFILTER_AGRN_TTL', 6 * 3600),
+            persist=settings.getbool('DUPEFILTER_PERSIST', True),
+            debug=settings.getbool('DUPEFILTER_DEBUG'),
+        )
+        if dupefilter.persist:
+            crawler.signals.connect(dupefilter.item_scraped, signal=signals.item_scraped)
+            crawler.signals.connect(dupefilter.item_save_failed, signal=item_save_failed)
+        return dupefilter
+
+    def open(self):
+        if not self.persist:
+            return
+
+        # One table per spider instance name, so concurrent sources don't clobber each other
+        name = getattr(self.crawler.spider, 'name', None) or self.crawler.spidercls.name
+        try:
+            data_dir = data_path('dupefilter', createdir=True)
+        except NotConfigured:
+            # Settings module set but no scrapy.cfg (e.g. run from a script elsewhere)
+            data_dir = os.path.join('.scrapy', 'dupefilter')
+            os.makedirs(data_dir, exist_ok=True)
+        self.store = SeenStore(os.path.join(data_dir, f"{name}.seen"))
+        self.previous = self.store.load()
+        logger.info(f"Loaded {len(self.previous)} previously scraped disasters from {self.store.path}")
+
+    def request_seen(self, request):
+        kind, key = request_key(request)
+        stats = self.crawler.stats
+
+        if (kind, key) in self.seen_this_run:
+            stats.inc_value(f'dupefilter/suppressed/{kind}')
+            return True
+        self.seen_this_run.add((kind, key))
+
+        if kind != 'agrn':
+            return False
+        fetched_at = self.previous.get(key_hash(kind, key))
+        if fetched_at is not None and time.time() - fetched_at < self.agrn_ttl:
+            stats.inc_value(f'dupefilter/suppressed/{kind}')
+            stats.inc_value('dupefilter/suppressed/previous_run')
+            return True
+        return False
+
+    def item_scraped(self, item, response, spider):
+        request = getattr(response, 'request', None)
+        if request is None or not request.meta.get('agrn'):
+            return
+        hashed = key_hash('agrn', agrn_key(request.meta['agrn']))
+        if hashed not in self.failed:
+            self.fetched[hashed] = int(time.time())
+
+    def item_save_failed(self, item, spider, error=None):
+        if item.get('agrn_reference'):
+            self.failed.add(key_hash('agrn', agrn_key(item['agrn_reference'])))
+
+    def close(self, reason):
+        if not self.persist or self.store is None:
+            return
+
+        # Merge with whatever is on disk now and drop expired entries
+        cutoff = time.time() - self.agrn_ttl
+        seen = {h: t for h, t in self.store.load().items() if t >= cutoff}
+        seen.update(self.fetched)
+        self.store.save(seen)
+        self.crawler.stats.set_value('dupefilter/persisted', len(seen))
+        logger.info(f"Saved {len(seen)} scraped disasters to {self.store.path}")
+
+    def log(self, request, spider):
+        kind, key = request_key(request)
+        if self.debug:
+            logger.debug(f"Filtered duplicate {kind} {key}: {request}", extra={'spider': spider})
+        elif self.logdupes:
+            logger.debug(
+                f"Filtered duplicate request: {request} - no more duplicates will be shown "
+                "(see DUPEFILTER_DEBUG to show all duplicates)",
+                extra={'spider': spider}
+            )
+            self.logdupes = False
+        self.crawler.stats.inc_value('dupefilter/filtered')
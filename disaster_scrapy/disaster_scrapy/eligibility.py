@@ -0,0 +1,221 @@
+# Bulk patient-postcode telehealth eligibility checks
+#
+# Clinics send postcode lists with thousands to millions of rows. Instead of
+# one database query per row, the postcode -> LGA mapping (australian_postcodes.csv,
+# as loaded by scripts/process-postcodes.py) is joined once against the active
+# disasters (expiry_date null, as written by SupabasePipeline) into a dense
+# 0000-9999 lookup table. Each CSV chunk is then a single array lookup.
+# Only declaration_status 'active' rows count; unverified AGRNs from state
+# sites are kept in disaster_declaration_leads and never read here.
+#
+# Usage:
+#   python -m disaster_scrapy.eligibility patients.csv results.csv
+#   python -m disaster_scrapy.eligibility patients.csv - --disasters active.json --column "Post Code"
+import argparse
+import csv
+import json
+import os
+import re
+import sys
+import time
+from collections import defaultdict
+from itertools import islice
+
+import numpy as np
+
+from disaster_scrapy.reference_data import load_postcode_rows
+
+
+POSTCODE_SPACE = 10000
+CHUNK_SIZE = 100000
+
+LGA_NAME_PREFIXES = re.compile(r'^(city|shire|town|municipality|borough) of ')
+LGA_NAME_SUFFIXES = re.compile(
+    r'( (city|shire|regional|municipal|town|aboriginal shire|district))?( council)?$'
+)
+
+
+def normalize_lga_name(name):
+    """Normalize an LGA name so scraped names match the reference CSV"""
+    name = re.sub(r'\(.*?\)', ' ', name.lower())
+    name = re.sub(r'[^a-z0-9]+', ' ', name).strip()
+    name = LGA_NAME_PREFIXES.sub('', name)
+    name = LGA_NAME_SUFFIXES.sub('', name)
+    return name.strip()
+
+
+def fetch_active_disasters(supabase, page_size=1000):
+    """Load active disasters (no expiry date, status active) from disaster_declarations"""
+    disasters = []
+    start = 0
+    while True:
+        result = supabase.table('disaster_declarations').select(
+            'agrn_reference,state_code,affected_areas'
+        ).is_('expiry_date', 'null').eq('declaration_status', 'active').range(
+            start, start + page_size - 1
+        ).execute()
+
+        disasters.extend(result.data or [])
+        if not result.data or len(result.data) < page_size:
+            return disasters
+        start += page_size
+
+
+class EligibilityIndex:
+    """Dense postcode -> active AGRN lookup for vectorized batch checks"""
+
+    def __init__(self, agrns, lga_codes):
+        # Both indexed by integer postcode 0..9999
+        self.agrns = agrns
+        self.lga_codes = lga_codes
+
+    @classmethod
+    def build(cls, postcode_rows, disasters, lga_index=None):
+        """Join postcode rows against active disaster records
+
+        Disasters are matched to LGAs by the names in affected_areas.all_lgas
+        within the same state. The record's lga_code is not used because
+        SupabasePipeline fills it with the state capital when lookup fails.
+        If an LgaIndex is given, postcodes without an lgacode are mapped to
+        their nearest LGA.
+        """
+        lgas_by_name = defaultdict(set)
+        postcode_lgas = defaultdict(set)
+        unmapped = set()
+
+        for row in postcode_rows:
+            if row['lga_code']:
+                postcode_lgas[row['postcode']].add(row['lga_code'])
+                if row['lga_name']:
+                    lgas_by_name[(row['state'], normalize_lga_name(row['lga_name']))].add(row['lga_code'])
+            else:
+                unmapped.add(row['postcode'])
+
+        if lga_index is not None:
+            unmapped = sorted(unmapped - set(postcode_lgas))
+            if unmapped:
+                codes, _ = lga_index.nearest_for_postcodes(unmapped, k=1)
+                for postcode, code in zip(unmapped, codes[:, 0]):
+                    if code:
+                        postcode_lgas[postcode].add(str(code))
+
+        lga_agrns = defaultdict(set)
+        for disaster in disasters:
+            areas = disaster.get('affected_areas') or {}
+            if isinstance(areas, str):
+                areas = json.loads(areas)
+            for name in areas.get('all_lgas') or []:
+                key = (disaster.get('state_code'), normalize_lga_name(name))
+                for lga_code in lgas_by_name.get(key, ()):
+                    lga_agrns[lga_code].add(disaster['agrn_reference'])
+
+        agrns = np.full(POSTCODE_SPACE, '', dtype=object)
+        lga_codes = np.full(POSTCODE_SPACE, '', dtype=object)
+        for postcode, codes in postcode_lgas.items():
+            if not postcode.isdigit() or int(postcode) >= POSTCODE_SPACE:
+                continue
+            matched = set().union(*(lga_agrns.get(code, set()) for code in codes))
+            agrns[int(postcode)] = ';'.join(sorted(matched))
+            lga_codes[int(postcode)] = ';'.join(sorted(codes))
+
+        return cls(agrns, lga_codes)
+
+    def lookup(self, postcodes):
+        """Return (eligible, agrns, lga_codes) arrays for an array of postcode strings"""
+        postcodes = np.char.strip(np.asarray(postcodes, dtype=str))
+        lengths = np.char.str_len(postcodes)
+
+        # ASCII 0-9 only: isdigit() also accepts characters like '²' that int() rejects
+        chars = postcodes.astype('<U4').view(np.uint32).reshape(len(postcodes), 4)
+        digits = (chars >= ord('0')) & (chars <= ord('9'))
+        in_postcode = np.arange(4) < lengths[:, None]
+        valid = (lengths >= 1) & (lengths <= 4) & (digits | ~in_postcode).all(axis=1)
+        index = np.where(valid, postcodes, '0').astype(np.int32)
+
+        agrns = np.where(valid, self.agrns[index], '')
+        lga_codes = np.where(valid, self.lga_codes[index], '')
+        return agrns != '', agrns, lga_codes
+
+
+def check_csv(in_file, out_file, index, column='postcode', chunk_size=CHUNK_SIZE):
+    """Stream a CSV of patient postcodes and write it back with eligibility columns"""
+    reader = csv.reader(in_file)
+    writer = csv.writer(out_file)
+
+    header = next(reader)
+    if column not in header:
+        raise ValueError(f"Column {column!r} not found in CSV header: {header}")
+    position = header.index(column)
+    writer.writerow(header + ['eligible', 'agrns', 'lga_codes'])
+
+    stats = {'rows': 0, 'eligible': 0}
+    while True:
+        chunk = list(islice(reader, chunk_size))
+        if not chunk:
+            return stats
+
+        postcodes = [row[position] if len(row) > position else '' for row in chunk]
+        eligible, agrns, lga_codes = index.lookup(postcodes)
+        flags = np.where(eligible, 'true', 'false')
+
+        writer.writerows(
+            row + [flag, agrn, codes]
+            for row, flag, agrn, codes in zip(chunk, flags.tolist(), agrns.tolist(), lga_codes.tolist())
+        )
+        stats['rows'] += len(chunk)
+        stats['eligible'] += int(eligible.sum())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Batch telehealth eligibility check for patient postcodes")
+    parser.add_argument('input', help="CSV with a postcode column ('-' for stdin)")
+    parser.add_argument('output', help="CSV to write ('-' for stdout)")
+    parser.add_argument('--column', default='postcode', help="Postcode column name")
+    parser.add_argument('--postcodes-csv', default='australian_postcodes.csv')
+    parser.add_argument('--disasters', help="JSON list of active disaster records instead of querying Supabase")
+    parser.add_argument('--lga-index', help="Nearest-LGA index (.npz) to map postcodes without an lgacode")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+
+    if args.disasters:
+        with open(args.disasters) as f:
+            disasters = [
+                d for d in json.load(f)
+                if not d.get('expiry_date') and d.get('declaration_status', 'active') == 'active'
+            ]
+    else:
+        from supabase import create_client
+        url = os.environ.get('SUPABASE_URL')
+        key = os.environ.get('SUPABASE_SERVICE_KEY')
+        if not url or not key:
+            parser.error("SUPABASE_URL and SUPABASE_SERVICE_KEY must be set (or pass --disasters)")
+        disasters = fetch_active_disasters(create_client(url, key))
+
+    lga_index = None
+    if args.lga_index:
+        from disaster_scrapy.lga_index import LgaIndex
+        lga_index = LgaIndex.load(args.lga_index)
+
+    index = EligibilityIndex.build(load_postcode_rows(args.postcodes_csv), disasters, lga_index)
+
+    in_file = sys.stdin if args.input == '-' else open(args.input, 'r', newline='')
+    out_file = sys.stdout if args.output == '-' else open(args.output, 'w', newline='')
+    try:
+        stats = check_csv(in_file, out_file, index, column=args.column)
+    finally:
+        if in_file is not sys.stdin:
+            in_file.close()
+        if out_file is not sys.stdout:
+            out_file.close()
+
+    print(
+        f"Checked {stats['rows']} rows against {len(disasters)} active disasters: "
+        f"{stats['eligible']} eligible for telehealth ({time.perf_counter() - started:.1f}s)",
+        file=sys.stderr
+    )
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
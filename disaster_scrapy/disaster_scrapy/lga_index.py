@@ -0,0 +1,300 @@
+# Spatial nearest-LGA index over postcode locality centroids
+#
+# Fallback for postcodes with no lgacode and for LGAs we cannot resolve by
+# name: given a coordinate (or an unmapped postcode) return the nearest
+# candidate LGAs. The index is a uniform grid over a sinusoidal projection
+# (km), stored as plain NumPy arrays in a single .npz file.
+#
+# Build:  python -m disaster_scrapy.lga_index build australian_postcodes.csv lga_index.npz
+# Query:  python -m disaster_scrapy.lga_index query lga_index.npz -33.87,151.21 2999
+import argparse
+import sys
+
+import numpy as np
+
+from disaster_scrapy.reference_data import load_postcode_rows
+
+
+KM_PER_DEGREE_LAT = 110.574
+KM_PER_DEGREE_LON = 111.320
+CENTRAL_MERIDIAN = 134.0  # Middle of mainland Australia
+
+# Grid search radii (in cells) tried before falling back to a full scan
+SEARCH_RADII = (1, 2, 4, 8)
+
+
+def project(lats, lons):
+    """Project lat/lon degrees to approximate km on a sinusoidal grid"""
+    lats = np.asarray(lats, dtype=np.float64)
+    lons = np.asarray(lons, dtype=np.float64)
+    x = (lons - CENTRAL_MERIDIAN) * np.cos(np.radians(lats)) * KM_PER_DEGREE_LON
+    y = lats * KM_PER_DEGREE_LAT
+    return x, y
+
+
+class LgaIndex:
+    """Grid index of LGA-coded locality centroids with vectorized k-nearest-LGA queries"""
+
+    def __init__(self, arrays):
+        self.x = arrays['x']
+        self.y = arrays['y']
+        self.point_lga = arrays['point_lga']
+        self.cell_offsets = arrays['cell_offsets']
+        self.lga_codes = arrays['lga_codes']
+        self.lga_names = arrays['lga_names']
+        self.postcodes = arrays['postcodes']
+        self.postcode_lat = arrays['postcode_lat']
+        self.postcode_lon = arrays['postcode_lon']
+        self.cell_km = float(arrays['cell_km'])
+        self.origin_x = float(arrays['origin_x'])
+        self.origin_y = float(arrays['origin_y'])
+        self.rows = int(arrays['rows'])
+        self.cols = int(arrays['cols'])
+
+    @classmethod
+    def build(cls, rows, cell_km=25.0):
+        """Build the index from reference_data.load_postcode_rows() output"""
+        lga_lookup = {}
+        point_lat, point_lon, point_lga = [], [], []
+        postcode_sums = {}
+
+        for row in rows:
+            if row['lat'] is None or row['long'] is None:
+                continue
+
+            sums = postcode_sums.setdefault(row['postcode'], [0.0, 0.0, 0])
+            sums[0] += row['lat']
+            sums[1] += row['long']
+            sums[2] += 1
+
+            if row['lga_code']:
+                if row['lga_code'] not in lga_lookup:
+                    lga_lookup[row['lga_code']] = (len(lga_lookup), row['lga_name'] or '')
+                point_lat.append(row['lat'])
+                point_lon.append(row['long'])
+                point_lga.append(lga_lookup[row['lga_code']][0])
+
+        if not point_lat:
+            raise ValueError("No rows with coordinates and an LGA code to index")
+
+        x, y = project(point_lat, point_lon)
+        origin_x, origin_y = x.min() - cell_km, y.min() - cell_km
+        cx = ((x - origin_x) // cell_km).astype(np.int64)
+        cy = ((y - origin_y) // cell_km).astype(np.int64)
+        cols = int(cx.max()) + 2
+        rows_count = int(cy.max()) + 2
+        keys = cy * cols + cx
+
+        # Sort points by cell so every cell is a contiguous slice of a CSR table
+        order = np.argsort(keys, kind='stable')
+        cell_offsets = np.zeros(rows_count * cols + 1, dtype=np.int64)
+        cell_offsets[1:] = np.cumsum(np.bincount(keys, minlength=rows_count * cols))
+
+        lga_codes = np.empty(len(lga_lookup), dtype=object)
+        lga_names = np.empty(len(lga_lookup), dtype=object)
+        for code, (idx, name) in lga_lookup.items():
+            lga_codes[idx] = code
+            lga_names[idx] = name
+
+        postcodes = sorted(postcode_sums)
+        postcode_lat = np.array([postcode_sums[p][0] / postcode_sums[p][2] for p in postcodes])
+        postcode_lon = np.array([postcode_sums[p][1] / postcode_sums[p][2] for p in postcodes])
+
+        return cls({
+            'x': x[order],
+            'y': y[order],
+            'point_lga': np.asarray(point_lga, dtype=np.int32)[order],
+            'cell_offsets': cell_offsets,
+            'lga_codes': lga_codes.astype(str),
+            'lga_names': lga_names.astype(str),
+            'postcodes': np.asarray(postcodes, dtype='U4'),
+            'postcode_lat': postcode_lat,
+            'postcode_lon': postcode_lon,
+            'cell_km': cell_km,
+            'origin_x': origin_x,
+            'origin_y': origin_y,
+            'rows': rows_count,
+            'cols': cols,
+        })
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            return cls({name: data[name] for name in data.files})
+
+    def save(self, path):
+        np.savez_compressed(
+            path,
+            x=self.x, y=self.y, point_lga=self.point_lga,
+            cell_offsets=self.cell_offsets,
+            lga_codes=self.lga_codes, lga_names=self.lga_names,
+            postcodes=self.postcodes, postcode_lat=self.postcode_lat, postcode_lon=self.postcode_lon,
+            cell_km=self.cell_km, origin_x=self.origin_x, origin_y=self.origin_y,
+            rows=self.rows, cols=self.cols,
+        )
+
+    def nearest(self, lats, lons, k=3):
+        """Return (lga_codes, distances_km) arrays of shape (n, k) for each coordinate
+
+        Candidates are the k nearest distinct LGAs, nearest first. Unused
+        slots are '' with distance inf; NaN coordinates get no candidates.
+        """
+        qx, qy = project(np.atleast_1d(lats), np.atleast_1d(lons))
+        n = len(qx)
+        codes = np.full((n, k), '', dtype=self.lga_codes.dtype)
+        dists = np.full((n, k), np.inf)
+
+        valid = np.flatnonzero(np.isfinite(qx) & np.isfinite(qy))
+        if not len(valid):
+            return codes, dists
+
+        lga_ids = np.full((len(valid), k), -1, dtype=np.int64)
+        lga_dists = np.full((len(valid), k), np.inf)
+
+        # Points outside a (2r+1)^2 block of cells are more than r cells away,
+        # so a query is settled once its k-th candidate is within that radius.
+        # Only queries still short of candidates widen the search.
+        pending = np.arange(len(valid))
+        for radius in SEARCH_RADII:
+            ids, d = self._grid_candidates(qx[valid[pending]], qy[valid[pending]], k, radius)
+            settled = d[:, -1] <= radius * self.cell_km
+            lga_ids[pending[settled]] = ids[settled]
+            lga_dists[pending[settled]] = d[settled]
+            pending = pending[~settled]
+            if not len(pending):
+                break
+
+        if len(pending):
+            ids, d = self._brute_force(qx[valid[pending]], qy[valid[pending]], k)
+            lga_ids[pending] = ids
+            lga_dists[pending] = d
+
+        found = lga_ids >= 0
+        rows = np.repeat(valid, k).reshape(-1, k)
+        codes[rows[found], np.nonzero(found)[1]] = self.lga_codes[lga_ids[found]]
+        dists[valid] = lga_dists
+        return codes, dists
+
+    def nearest_for_postcodes(self, postcodes, k=3):
+        """Return nearest LGAs for postcodes using their locality centroid"""
+        postcodes = np.char.zfill(np.asarray(postcodes, dtype=str), 4)
+        pos = np.searchsorted(self.postcodes, postcodes)
+        pos = np.clip(pos, 0, max(len(self.postcodes) - 1, 0))
+        known = self.postcodes[pos] == postcodes
+        lats = np.where(known, self.postcode_lat[pos], np.nan)
+        lons = np.where(known, self.postcode_lon[pos], np.nan)
+        return self.nearest(lats, lons, k)
+
+    def _grid_candidates(self, qx, qy, k, radius):
+        n = len(qx)
+        cx = ((qx - self.origin_x) // self.cell_km).astype(np.int64)
+        cy = ((qy - self.origin_y) // self.cell_km).astype(np.int64)
+
+        # (n, cells) neighbouring cell coordinates, then slice each out of the CSR table
+        dx, dy = np.meshgrid(np.arange(-radius, radius + 1), np.arange(-radius, radius + 1))
+        ncx = cx[:, None] + dx.ravel()
+        ncy = cy[:, None] + dy.ravel()
+        cells = dx.size
+        in_grid = (ncx >= 0) & (ncx < self.cols) & (ncy >= 0) & (ncy < self.rows)
+        keys = np.where(in_grid, ncy * self.cols + ncx, 0).ravel()
+
+        starts = self.cell_offsets[keys]
+        counts = np.where(in_grid.ravel(), self.cell_offsets[keys + 1] - starts, 0)
+
+        # Expand every (query, cell) slice into flat candidate point indices
+        total = int(counts.sum())
+        query = np.repeat(np.repeat(np.arange(n), cells), counts)
+        offsets = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+        points = np.repeat(starts, counts) + offsets
+
+        d = np.hypot(self.x[points] - qx[query], self.y[points] - qy[query])
+        return self._top_k_lgas(query, self.point_lga[points], d, n, k)
+
+    def _brute_force(self, qx, qy, k, chunk=256):
+        # Points grouped by LGA so a per-LGA minimum is one reduceat per row
+        order = np.argsort(self.point_lga, kind='stable')
+        lga_sorted = self.point_lga[order]
+        bounds = np.flatnonzero(np.r_[True, lga_sorted[1:] != lga_sorted[:-1]])
+        px, py = self.x[order], self.y[order]
+        k_found = min(k, len(bounds))
+
+        ids = np.full((len(qx), k), -1, dtype=np.int64)
+        dists = np.full((len(qx), k), np.inf)
+        for start in range(0, len(qx), chunk):
+            bx, by = qx[start:start + chunk, None], qy[start:start + chunk, None]
+            per_lga = np.minimum.reduceat(np.hypot(px - bx, py - by), bounds, axis=1)
+            nearest = np.argsort(per_lga, axis=1)[:, :k_found]
+            ids[start:start + chunk, :k_found] = lga_sorted[bounds][nearest]
+            dists[start:start + chunk, :k_found] = np.take_along_axis(per_lga, nearest, axis=1)
+        return ids, dists
+
+    def _top_k_lgas(self, query, lga, d, n, k):
+        """Reduce (query, lga, distance) candidate triples to the k nearest distinct LGAs per query"""
+        ids = np.full((n, k), -1, dtype=np.int64)
+        dists = np.full((n, k), np.inf)
+        if not len(query):
+            return ids, dists
+
+        # Nearest point per (query, lga) pair
+        n_lgas = len(self.lga_codes)
+        pair = query.astype(np.int64) * n_lgas + lga
+        order = np.argsort(pair)
+        pair, d = pair[order], d[order]
+        starts = np.flatnonzero(np.r_[True, pair[1:] != pair[:-1]])
+        d = np.minimum.reduceat(d, starts)
+        query, lga = np.divmod(pair[starts], n_lgas)
+
+        # Rank LGAs by distance within each query and keep the first k
+        order = np.lexsort((d, query))
+        query, lga, d = query[order], lga[order], d[order]
+        group_start = np.searchsorted(query, query, side='left')
+        rank = np.arange(len(query)) - group_start
+        keep = rank < k
+        ids[query[keep], rank[keep]] = lga[keep]
+        dists[query[keep], rank[keep]] = d[keep]
+        return ids, dists
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Nearest-LGA spatial index over postcode centroids")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    build = commands.add_parser('build', help="Build the index from australian_postcodes.csv")
+    build.add_argument('csv', nargs='?', default='australian_postcodes.csv')
+    build.add_argument('output', nargs='?', default='lga_index.npz')
+    build.add_argument('--cell-km', type=float, default=25.0)
+
+    query = commands.add_parser('query', help="Look up candidate LGAs for coordinates or postcodes")
+    query.add_argument('index')
+    query.add_argument('targets', nargs='+', help="LAT,LON pairs or 4-digit postcodes")
+    query.add_argument('-k', type=int, default=3)
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'build':
+        index = LgaIndex.build(load_postcode_rows(args.csv), cell_km=args.cell_km)
+        index.save(args.output)
+        print(f"Indexed {len(index.x)} localities across {len(index.lga_codes)} LGAs "
+              f"and {len(index.postcodes)} postcodes")
+        print(f"Index saved to: {args.output}")
+        return 0
+
+    index = LgaIndex.load(args.index)
+    names = dict(zip(index.lga_codes, index.lga_names))
+    for target in args.targets:
+        if ',' in target:
+            lat, lon = (float(v) for v in target.split(','))
+            codes, dists = index.nearest([lat], [lon], args.k)
+        else:
+            codes, dists = index.nearest_for_postcodes([target], args.k)
+
+        candidates = [
+            f"{code} {names[code]} ({dist:.1f}km)"
+            for code, dist in zip(codes[0], dists[0]) if code
+        ]
+        print(f"{target}: {'; '.join(candidates) if candidates else 'no candidates'}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
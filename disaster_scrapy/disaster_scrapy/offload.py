@@ -0,0 +1,108 @@
+# Process-pool offload for detail page extraction
+#
+# When detail pages come from HTTPCACHE or a bulk backfill the crawl is CPU
+# bound, and all of parse_disaster's selector and is_likely_lga work would
+# otherwise run on the single reactor thread. With -a workers=N the spider
+# ships each page body (plus the few meta fields parse_disaster reads) to a
+# pool of worker processes running the same extraction code, and gets a
+# plain record back. The record re-enters Scrapy on the reactor thread, so
+# pipelines run exactly as before.
+#
+# At most OFFLOAD_MAX_IN_FLIGHT pages (default 2 per worker) are queued to
+# the pool at once; the rest wait on a semaphore, which in turn applies
+# Scrapy's normal scraper backpressure to downloads.
+#
+# Workers finish out of order, but records are released in the order their
+# pages arrived, so pipelines see the same sequence as an in-process crawl.
+# A finished record keeps its semaphore slot until every earlier one has been
+# released, so one slow page holds back at most OFFLOAD_MAX_IN_FLIGHT records.
+#
+#   scrapy crawl disasters_medicare -a workers=4 -s HTTPCACHE_ENABLED=True
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from twisted.internet.defer import Deferred, DeferredSemaphore, succeed
+from twisted.python.failure import Failure
+
+
+# response.meta keys parse_disaster reads, the only meta sent to workers
+DETAIL_META_KEYS = ('start_date', 'end_date', 'state', 'type', 'name', 'agrn')
+
+_worker_spider = None
+
+
+def _init_worker(spider_cls, parser):
+    """Build one spider per worker process to run the extraction code"""
+    global _worker_spider
+    from disaster_scrapy.parsers import get_backend
+
+    _worker_spider = spider_cls(parser=parser)
+    _worker_spider.parser_backend = get_backend(parser)
+
+
+def _extract(url, body, encoding, meta):
+    from scrapy.http import HtmlResponse, Request
+
+    response = HtmlResponse(
+        url=url, body=body, encoding=encoding, request=Request(url, meta=meta)
+    )
+    return _worker_spider.extract_disaster(response)
+
+
+class ExtractionPool:
+    """Run DisasterSpider.extract_disaster in worker processes"""
+
+    def __init__(self, spider_cls, workers, parser='parsel', max_in_flight=None):
+        self.workers = workers
+        self.executor = ProcessPoolExecutor(
+            max_workers=workers,
+            # Forking a process with a running reactor and its threads is unsafe
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_worker,
+            initargs=(spider_cls, parser)
+        )
+        self.semaphore = DeferredSemaphore(max_in_flight or workers * 2)
+        self.submitted = 0
+        self.last_release = succeed(None)  # fires once the latest submission is released
+
+    def extract(self, response):
+        """Return a Deferred firing with the extracted record, in submission order"""
+        meta = {key: response.meta.get(key) for key in DETAIL_META_KEYS}
+        previous, release = self.last_release, Deferred()
+        self.last_release = release
+
+        result = Deferred()
+        d = self.semaphore.acquire()
+        d.addCallback(lambda _: self._submit(response.url, response.body, response.encoding, meta))
+        d.addBoth(lambda outcome: previous.addCallback(self._release, outcome, result, release))
+        return result
+
+    def _release(self, _, outcome, result, release):
+        """Fire a finished extraction's result, then let the next one go"""
+        self.semaphore.release()
+        if isinstance(outcome, Failure):
+            result.errback(outcome)
+        else:
+            result.callback(outcome)
+        release.callback(None)
+
+    def _submit(self, url, body, encoding, meta):
+        from twisted.internet import reactor
+
+        self.submitted += 1
+        future = self.executor.submit(_extract, url, body, encoding, meta)
+        d = Deferred()
+
+        def done(f):
+            # Runs on the executor's management thread
+            error = f.exception()
+            if error is not None:
+                reactor.callFromThread(d.errback, Failure(error))
+            else:
+                reactor.callFromThread(d.callback, f.result())
+
+        future.add_done_callback(done)
+        return d
+
+    def shutdown(self):
+        self.executor.shutdown(wait=True, cancel_futures=True)
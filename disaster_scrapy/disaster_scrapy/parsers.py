@@ -0,0 +1,165 @@
+# Parser backends for disaster detail pages
+#
+# parse_disaster only needs a handful of text nodes from each detail page.
+# A backend pulls those raw text nodes out; DisasterSpider applies the LGA,
+# assistance and quick-info rules on top. All backends must return identical
+# output for the same page.
+#
+#   parsel  Scrapy's default selectors (reference implementation)
+#   lxml    The same XPath queries (translated from the parsel CSS with
+#           parsel's own translator) compiled once and run straight on the
+#           raw body bytes, with no full-text decode and no Selector objects
+#
+# Select per run with -a parser=lxml or the PARSER_BACKEND setting.
+#
+# Compare backends on saved pages:
+#   python -m disaster_scrapy.parsers page1.html page2.html
+import argparse
+import sys
+import time
+
+from lxml import etree, html
+from parsel.csstranslator import HTMLTranslator
+
+
+# CSS queries used by parse_disaster, keyed by output field
+DETAIL_QUERIES = {
+    'content_items': '.content-area li::text',
+    'paragraphs': 'p::text',
+    'dt': 'dt::text',
+    'dd': 'dd::text',
+    'h1': 'h1::text',
+    'title': 'title::text',
+}
+LIST_QUERY = 'ul'
+LIST_ITEM_QUERY = 'li::text'
+
+FIRST_ONLY = ('h1', 'title')
+
+ENCODING_ERRORS = {
+    etree.ErrorTypes.ERR_INVALID_CHAR,
+    etree.ErrorTypes.ERR_INVALID_ENCODING,
+    etree.ErrorTypes.ERR_UNKNOWN_ENCODING,
+}
+
+
+class ParselBackend:
+    """Extract detail-page text nodes with Scrapy/parsel selectors"""
+    name = 'parsel'
+
+    def extract_detail(self, response):
+        fields = {}
+
+        # Every li text under every ul, one ul at a time (nested lists repeat)
+        fields['list_items'] = []
+        for ul in response.css(LIST_QUERY):
+            fields['list_items'].extend(ul.css(LIST_ITEM_QUERY).getall())
+
+        for field, query in DETAIL_QUERIES.items():
+            if field in FIRST_ONLY:
+                fields[field] = response.css(query).get()
+            else:
+                fields[field] = response.css(query).getall()
+        return fields
+
+
+class LxmlBackend:
+    """Extract detail-page text nodes with precompiled lxml XPath on raw bytes"""
+    name = 'lxml'
+
+    def __init__(self):
+        translator = HTMLTranslator()
+
+        def compile_css(query, prefix='descendant-or-self::'):
+            return etree.XPath(translator.css_to_xpath(query, prefix), smart_strings=False)
+
+        self.list_xpath = compile_css(LIST_QUERY)
+        self.list_item_xpath = compile_css(LIST_ITEM_QUERY)
+        self.detail_xpaths = {field: compile_css(query) for field, query in DETAIL_QUERIES.items()}
+        self.parser = html.HTMLParser(recover=True, encoding='utf-8', huge_tree=True)
+
+    def root(self, response):
+        """Parse the response body the same way parsel would, without decoding it first"""
+        encoding = (response.encoding or '').lower().replace('_', '-')
+        if encoding in ('utf-8', 'utf8', 'ascii', 'us-ascii'):
+            body = response.body.replace(b'\x00', b'').strip() or b'<html/>'
+            root = etree.fromstring(body, parser=self.parser, base_url=response.url)
+            if root is not None and not any(
+                error.type in ENCODING_ERRORS for error in self.parser.error_log
+            ):
+                return root
+
+        # Other codecs, or invalid UTF-8: let Scrapy decode (with replacement
+        # characters) exactly as it does for parsel
+        body = response.text.strip().replace('\x00', '').encode('utf-8') or b'<html/>'
+        return etree.fromstring(body, parser=self.parser, base_url=response.url)
+
+    def extract_detail(self, response):
+        root = self.root(response)
+        fields = {}
+
+        fields['list_items'] = []
+        for ul in self.list_xpath(root):
+            fields['list_items'].extend(self.list_item_xpath(ul))
+
+        for field, xpath in self.detail_xpaths.items():
+            values = xpath(root)
+            if field in FIRST_ONLY:
+                fields[field] = values[0] if values else None
+            else:
+                fields[field] = values
+        return fields
+
+
+BACKENDS = {
+    ParselBackend.name: ParselBackend,
+    LxmlBackend.name: LxmlBackend,
+}
+
+
+def get_backend(name):
+    """Instantiate a parser backend by name"""
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown parser backend {name!r}, expected one of: {', '.join(BACKENDS)}")
+    return BACKENDS[name]()
+
+
+def main(argv=None):
+    from scrapy.http import HtmlResponse
+
+    parser = argparse.ArgumentParser(description="Check parser backends agree and compare their throughput")
+    parser.add_argument('pages', nargs='+', help="Saved detail page HTML files")
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args(argv)
+
+    bodies = []
+    for path in args.pages:
+        with open(path, 'rb') as f:
+            bodies.append((path, f.read()))
+
+    def responses():
+        # Fresh responses each pass so parsel's cached selector isn't reused
+        return [HtmlResponse(url=f"file://{path}", body=body, encoding='utf-8') for path, body in bodies]
+
+    backends = [get_backend(name) for name in BACKENDS]
+    reference = [backends[0].extract_detail(r) for r in responses()]
+    for backend in backends[1:]:
+        for (path, _), expected, response in zip(bodies, reference, responses()):
+            if backend.extract_detail(response) != expected:
+                print(f"❌ {backend.name} output differs from {backends[0].name} on {path}")
+                return 1
+
+    for backend in backends:
+        batches = [responses() for _ in range(args.repeat)]
+        started = time.perf_counter()
+        for batch in batches:
+            for response in batch:
+                backend.extract_detail(response)
+        elapsed = time.perf_counter() - started
+        pages = args.repeat * len(bodies)
+        print(f"{backend.name:<8} {pages / elapsed:>10.0f} pages/s")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -2,8 +2,40 @@
 import os
 import json
 from datetime import datetime
+from scrapy.exceptions import NotConfigured
 from supabase import create_client, Client
 
+from disaster_scrapy.signals import item_save_failed
+
+
+def declaration_status(item):
+    """The item's own status (e.g. 'unverified' state leads), else one from expiry_date"""
+    if item.get('declaration_status'):
+        return item['declaration_status']
+    return 'expired' if item.get('expiry_date') else 'active'
+
+
+def lead_record(item, spider):
+    """Build a disaster_declaration_leads row for an unverified state-site AGRN"""
+    return {
+        'agrn_reference': item['agrn_reference'],
+        'data_source': item.get('source'),
+        'source_system': getattr(spider, 'source_system', 'Scrapy State v1'),
+        'state_code': item['state_code'],
+        'event_name': item.get('event_name'),
+        'disaster_type': item.get('disaster_type', 'other'),
+        'affected_areas': {
+            'all_lgas': item.get('all_lgas', []),
+            'lga_count': item.get('lga_count', 0),
+            'checksum': item.get('checksum'),
+            'extracted_at': item.get('scraped_at')
+        },
+        'description': item.get('description'),
+        'source_url': item.get('source_url'),
+        'last_seen_at': datetime.now().isoformat()
+    }
+
+
 class ValidationPipeline:
     """Validate data before saving"""
     
@@ -38,6 +70,10 @@ class SupabasePipeline:
     
     def process_item(self, item, spider):
         try:
+            if declaration_status(item) == 'unverified':
+                self.save_lead(item, spider)
+                return item
+            
             # Look up primary LGA code
             lga_code = self.get_lga_code(item['state_code'], item.get('all_lgas', []))
             
@@ -49,7 +85,7 @@ class SupabasePipeline:
                 'state_code': item['state_code'],
                 'declaration_date': item.get('declaration_date'),
                 'expiry_date': item.get('expiry_date'),
-                'declaration_status': 'expired' if item.get('expiry_date') else 'active',
+                'declaration_status': declaration_status(item),
                 'declaration_authority': 'Australian Government',
                 'severity_level': 3,
                 'lga_code': lga_code,
@@ -64,8 +100,8 @@ class SupabasePipeline:
                 'description': item.get('description'),
                 'source_url': item.get('source_url'),
                 'verification_url': item.get('source_url'),
-                'data_source': 'disasterassist.gov.au',
-                'source_system': 'Scrapy Primary v1',
+                'data_source': item.get('source', 'disasterassist.gov.au'),
+                'source_system': getattr(spider, 'source_system', 'Scrapy Primary v1'),
                 'last_sync_timestamp': datetime.now().isoformat()
             }
             
@@ -91,9 +127,31 @@ class SupabasePipeline:
             
             # Log to audit table
             self.log_error(item, str(e))
+            
+            # Keep the dupefilter from treating this disaster as done
+            spider.crawler.signals.send_catch_log(
+                signal=item_save_failed, item=item, spider=spider, error=str(e)
+            )
         
         return item
     
+    def save_lead(self, item, spider):
+        """Record a state-site AGRN for review, outside disaster_declarations
+        
+        State pages also cite old or unrelated AGRNs, so these never count
+        towards telehealth eligibility until the federal list confirms them.
+        """
+        self.supabase.table('disaster_declaration_leads').upsert(
+            lead_record(item, spider),
+            on_conflict='agrn_reference,data_source'
+        ).execute()
+        
+        self.saved_count += 1
+        spider.logger.info(
+            f"📝 Recorded lead {item['agrn_reference']} from {item.get('source')} "
+            f"with {item.get('lga_count', 0)} LGAs - UNVERIFIED (not eligible)"
+        )
+    
     def get_lga_code(self, state_code, lgas):
         """Look up LGA code from registry"""
         if not lgas:
@@ -151,7 +209,7 @@ class SupabasePipeline:
         # Save audit summary
         try:
             self.supabase.table('scraper_audit').insert({
-                'scraper': 'Scrapy Primary v1',
+                'scraper': getattr(spider, 'source_system', 'Scrapy Primary v1'),
                 'disasters_found': self.saved_count,
                 'errors': self.error_count,
                 'error_details': self.errors[:10] if self.errors else [],
@@ -176,13 +234,18 @@ class AuditPipeline:
             'name': item.get('event_name'),
             'lgas': item.get('lga_count', 0),
             'has_end_date': bool(item.get('expiry_date')),
-            'checksum': item.get('checksum')
+            'status': declaration_status(item),
+            'checksum': item.get('checksum'),
+            'source': item.get('source')
         })
         return item
     
     def close_spider(self, spider):
         """Save audit log"""
         audit_file = f"audit_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+        if getattr(spider, 'audit_tag', None):
+            # Several sources can finish in the same second
+            audit_file = f"audit_{spider.audit_tag}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
         
         with open(audit_file, 'w') as f:
             json.dump({
@@ -190,14 +253,53 @@ class AuditPipeline:
                 'started': spider.crawler.stats.get_value('start_time').isoformat(),
                 'finished': datetime.now().isoformat(),
                 'total_disasters': len(self.audit_data),
-                'eligible_for_telehealth': len([d for d in self.audit_data if not d['has_end_date']]),
-                'not_eligible': len([d for d in self.audit_data if d['has_end_date']]),
+                'eligible_for_telehealth': len([d for d in self.audit_data if d['status'] == 'active']),
+                'not_eligible': len([d for d in self.audit_data if d['status'] == 'expired']),
+                'unverified': len([d for d in self.audit_data if d['status'] == 'unverified']),
                 'disasters': self.audit_data
             }, f, indent=2)
         
         spider.logger.info(f"Audit log saved to: {audit_file}")
 
 
+class ParquetExportPipeline:
+    """Write the full normalized record of every crawl to partitioned Parquet"""
+    
+    def __init__(self, base_dir, batch_size):
+        self.base_dir = base_dir
+        self.batch_size = batch_size
+        self.writer = None
+    
+    @classmethod
+    def from_crawler(cls, crawler):
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise NotConfigured("pyarrow is not installed, skipping Parquet snapshot export")
+        
+        return cls(
+            crawler.settings.get('SNAPSHOT_DIR', 'snapshots'),
+            crawler.settings.getint('SNAPSHOT_BATCH_SIZE', 500)
+        )
+    
+    def open_spider(self, spider):
+        from disaster_scrapy.snapshots import SnapshotWriter
+        run_id = f"{spider.name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        self.writer = SnapshotWriter(self.base_dir, run_id, self.batch_size)
+    
+    def process_item(self, item, spider):
+        self.writer.add(dict(item))
+        return item
+    
+    def close_spider(self, spider):
+        """Flush remaining rows"""
+        self.writer.flush()
+        rows = ', '.join(f"{count} {table}" for table, count in self.writer.rows_written.items())
+        spider.logger.info(
+            f"Snapshot saved to: {self.base_dir} ({rows} rows in {len(self.writer.files)} files)"
+        )
+
+
 # Exception for dropping items
 class DropItem(Exception):
     pass
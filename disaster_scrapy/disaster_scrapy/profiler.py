@@ -0,0 +1,204 @@
+# On-demand sampling profiler for spider callbacks and pipelines
+#
+# Enable per run with:  scrapy crawl disasters_medicare -a profile=1
+#
+# A wall-clock timer interrupts the reactor thread every PROFILE_INTERVAL
+# seconds and records the current stack, but only when one of the profiled
+# callbacks (spider parse methods or a pipeline's process_item) is on it.
+# Nothing is wrapped or traced between samples, so overhead stays low enough
+# for production runs. At close the collapsed stacks are written one file per
+# callback (flamegraph.pl / speedscope ready) along with a top-N table.
+import os
+import signal
+from collections import Counter, defaultdict
+from datetime import datetime
+
+from scrapy import signals
+from scrapy.exceptions import NotConfigured
+from scrapy.utils.conf import build_component_list
+from scrapy.utils.misc import load_object
+
+
+TRUTHY = ('1', 'true', 'yes', 'on')
+
+
+def frame_label(code):
+    """Format a code object as a stack frame name"""
+    name = getattr(code, 'co_qualname', code.co_name)
+    return f"{name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    """Signal-driven stack sampler attributing samples to target callbacks"""
+
+    def __init__(self, targets, interval=0.005):
+        # targets maps code object -> callback label
+        self.targets = targets
+        self.interval = interval
+        self.stacks = defaultdict(Counter)
+        self.total_samples = 0
+        self.idle_samples = 0
+        self.running = False
+        self._previous_handler = None
+
+    def start(self):
+        self._previous_handler = signal.signal(signal.SIGALRM, self._sample)
+        signal.setitimer(signal.ITIMER_REAL, self.interval, self.interval)
+        self.running = True
+
+    def stop(self):
+        if not self.running:
+            return
+        signal.setitimer(signal.ITIMER_REAL, 0, 0)
+        signal.signal(signal.SIGALRM, self._previous_handler or signal.SIG_DFL)
+        self.running = False
+
+    def _sample(self, signum, frame):
+        self.total_samples += 1
+
+        # Walk from the interrupted frame up to the outermost profiled callback
+        codes = []
+        label = None
+        depth = 0
+        while frame is not None:
+            code = frame.f_code
+            codes.append(code)
+            if code in self.targets:
+                label = self.targets[code]
+                depth = len(codes)
+            frame = frame.f_back
+
+        if label is None:
+            self.idle_samples += 1
+            return
+
+        # Keep root -> leaf order below the callback, as collapsed stacks expect
+        self.stacks[label][tuple(reversed(codes[:depth]))] += 1
+
+    def callback_samples(self):
+        return {label: sum(stacks.values()) for label, stacks in self.stacks.items()}
+
+    def hot_functions(self, top_n=20):
+        """Return (label, self_samples, total_samples) rows sorted by self time"""
+        self_counts = Counter()
+        total_counts = Counter()
+        for stacks in self.stacks.values():
+            for stack, count in stacks.items():
+                self_counts[stack[-1]] += count
+                for code in set(stack):
+                    total_counts[code] += count
+
+        ranked = sorted(total_counts, key=lambda c: (self_counts[c], total_counts[c]), reverse=True)
+        return [(frame_label(c), self_counts[c], total_counts[c]) for c in ranked[:top_n]]
+
+    def write(self, out_dir, top_n=20):
+        """Write one collapsed-stack file per callback plus a hot-function table"""
+        os.makedirs(out_dir, exist_ok=True)
+        written = []
+
+        for label, stacks in self.stacks.items():
+            path = os.path.join(out_dir, f"{label}.collapsed")
+            with open(path, 'w') as f:
+                for stack, count in stacks.most_common():
+                    f.write(';'.join([label] + [frame_label(c) for c in stack]))
+                    f.write(f" {count}\n")
+            written.append(path)
+
+        path = os.path.join(out_dir, 'top.txt')
+        with open(path, 'w') as f:
+            f.write('\n'.join(self.format_report(top_n)) + '\n')
+        written.append(path)
+
+        return written
+
+    def format_report(self, top_n=20):
+        profiled = self.total_samples - self.idle_samples
+        lines = [
+            f"Samples: {self.total_samples} total, {profiled} in profiled callbacks "
+            f"({self.interval * 1000:.1f}ms interval)",
+            "",
+            "Per callback:",
+        ]
+        for label, count in sorted(self.callback_samples().items(), key=lambda kv: -kv[1]):
+            lines.append(f"  {count:>8}  {self._pct(count, profiled):>6}  {label}")
+
+        lines += ["", f"Top {top_n} functions:", f"  {'self':>8}  {'self%':>6}  {'total':>8}  {'total%':>6}  function"]
+        for name, self_count, total_count in self.hot_functions(top_n):
+            lines.append(
+                f"  {self_count:>8}  {self._pct(self_count, profiled):>6}  "
+                f"{total_count:>8}  {self._pct(total_count, profiled):>6}  {name}"
+            )
+        return lines
+
+    @staticmethod
+    def _pct(count, total):
+        return f"{100.0 * count / total:.1f}%" if total else "0.0%"
+
+
+class ProfilerExtension:
+    """Profile spider callbacks and pipelines when run with -a profile=1"""
+
+    def __init__(self, crawler):
+        self.crawler = crawler
+        self.interval = crawler.settings.getfloat('PROFILE_INTERVAL', 0.005)
+        self.top_n = crawler.settings.getint('PROFILE_TOP_N', 20)
+        self.out_dir = crawler.settings.get('PROFILE_DIR', 'profiles')
+        self.callbacks = crawler.settings.getlist('PROFILE_CALLBACKS', ['parse', 'parse_disaster'])
+        self.profiler = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        if not hasattr(signal, 'setitimer'):
+            raise NotConfigured("Sampling profiler needs signal.setitimer (POSIX only)")
+
+        ext = cls(crawler)
+        crawler.signals.connect(ext.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(ext.spider_closed, signal=signals.spider_closed)
+        return ext
+
+    def spider_opened(self, spider):
+        if str(getattr(spider, 'profile', '')).lower() not in TRUTHY:
+            return
+
+        targets = self.collect_targets(spider)
+        self.profiler = SamplingProfiler(targets, self.interval)
+        self.profiler.start()
+        spider.logger.info(
+            f"🔬 Profiling {len(targets)} callbacks every {self.interval * 1000:.1f}ms: "
+            f"{', '.join(sorted(targets.values()))}"
+        )
+
+    def collect_targets(self, spider):
+        """Map the code objects of profiled callbacks to their labels"""
+        targets = {}
+
+        for name in self.callbacks:
+            method = getattr(type(spider), name, None)
+            if method is not None and hasattr(method, '__code__'):
+                targets[method.__code__] = name
+
+        pipelines = build_component_list(self.crawler.settings.getwithbase('ITEM_PIPELINES'))
+        for path in pipelines:
+            pipeline_cls = load_object(path)
+            method = getattr(pipeline_cls, 'process_item', None)
+            if method is not None and hasattr(method, '__code__'):
+                targets[method.__code__] = f"{pipeline_cls.__name__}.process_item"
+
+        return targets
+
+    def spider_closed(self, spider, reason):
+        if self.profiler is None:
+            return
+
+        self.profiler.stop()
+        out_dir = os.path.join(
+            self.out_dir, f"profile_{spider.name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        )
+        written = self.profiler.write(out_dir, self.top_n)
+
+        spider.logger.info("="*80)
+        spider.logger.info("PROFILE SUMMARY:")
+        for line in self.profiler.format_report(self.top_n):
+            spider.logger.info(line)
+        spider.logger.info(f"Profile written to: {out_dir} ({len(written)} files)")
+        spider.logger.info("="*80)
@@ -0,0 +1,49 @@
+# Australian postcode/LGA reference data
+#
+# Reads the same australian_postcodes.csv that scripts/process-postcodes.py
+# turns into load_australian_data.sql. Rows are kept on the same rule (postcode
+# and state both present) and STATE_MAPPING mirrors the script's state_mapping,
+# but this is a separate reader: unlike the script, coordinates are parsed
+# here, so blank, non-numeric or 0 lat/long values become None instead of
+# being passed through as raw strings.
+import csv
+
+
+STATE_MAPPING = {
+    'NSW': {'id': 1, 'name': 'New South Wales'},
+    'VIC': {'id': 2, 'name': 'Victoria'},
+    'QLD': {'id': 3, 'name': 'Queensland'},
+    'SA': {'id': 4, 'name': 'South Australia'},
+    'WA': {'id': 5, 'name': 'Western Australia'},
+    'TAS': {'id': 6, 'name': 'Tasmania'},
+    'NT': {'id': 7, 'name': 'Northern Territory'},
+    'ACT': {'id': 8, 'name': 'Australian Capital Territory'}
+}
+
+
+def parse_coordinate(value):
+    """Return a float coordinate, or None for blank/invalid values"""
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    # Some rows use 0,0 as "unknown"
+    return value if value != 0 else None
+
+
+def load_postcode_rows(csv_path='australian_postcodes.csv'):
+    """Yield normalized postcode locality rows from australian_postcodes.csv"""
+    with open(csv_path, 'r', newline='') as f:
+        reader = csv.DictReader(f)
+        for row in reader:
+            if not row.get('postcode') or not row.get('state'):
+                continue
+            yield {
+                'postcode': row['postcode'].zfill(4),
+                'suburb': row.get('locality'),
+                'state': row['state'],
+                'lat': parse_coordinate(row.get('lat')),
+                'long': parse_coordinate(row.get('long')),
+                'lga_name': row.get('lgaregion') or None,
+                'lga_code': row.get('lgacode') or None
+            }
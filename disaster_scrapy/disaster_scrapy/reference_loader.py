@@ -0,0 +1,443 @@
+# Load states, LGAs and postcodes straight into Postgres
+#
+# Replaces applying load_australian_data.sql by hand. Rows are built from
+# australian_postcodes.csv with the same selection rules as
+# scripts/process-postcodes.py (except that blank or 0 coordinates are loaded
+# as NULL, see reference_data.py), streamed over parallel COPY connections into UNLOGGED staging tables
+# (schema reference_staging) and validated there. Only then are they merged
+# into public.states_territories / lgas / postcodes in a single transaction:
+# changed rows are updated, new rows inserted and, with --prune, rows no
+# longer in the CSV deleted. Readers see the old data until that transaction
+# commits, so there is never a half-loaded window. The merge is done in
+# place, rather than renaming staging tables over the live ones, so RLS
+# policies, grants and foreign keys on those tables are left untouched.
+#
+# Use the direct (session) connection string, not the transaction pooler.
+#
+# Usage (connection from --dsn or DATABASE_URL):
+#   python -m disaster_scrapy.reference_loader australian_postcodes.csv --dry-run
+#   python -m disaster_scrapy.reference_loader australian_postcodes.csv --prune
+#   python -m disaster_scrapy.reference_loader australian_postcodes.csv --dsn postgresql://localhost/telecheck --create-tables
+import argparse
+import csv
+import io
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import psycopg2
+import psycopg2.extras
+
+from disaster_scrapy.reference_data import STATE_MAPPING, load_postcode_rows
+
+
+STAGING_SCHEMA = 'reference_staging'
+
+# Live tables in dependency order (states before the tables that reference them)
+TABLES = {
+    'states_territories': {
+        'key': 'id',
+        'columns': {'id': 'integer', 'name': 'text', 'abbreviation': 'text'},
+    },
+    'lgas': {
+        'key': 'lga_code',
+        'columns': {'lga_code': 'text', 'name': 'text', 'state_territory_id': 'integer'},
+    },
+    'postcodes': {
+        'key': 'postcode',
+        'columns': {
+            'postcode': 'text',
+            'suburb': 'text',
+            'state_territory_id': 'integer',
+            'latitude': 'numeric',
+            'longitude': 'numeric',
+        },
+    },
+}
+
+# Minimal live tables for a local test database (--create-tables)
+LOCAL_SCHEMA = """
+CREATE TABLE IF NOT EXISTS public.states_territories (
+    id integer PRIMARY KEY,
+    name text NOT NULL,
+    abbreviation text NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS public.lgas (
+    lga_code text PRIMARY KEY,
+    name text NOT NULL,
+    state_territory_id integer REFERENCES public.states_territories(id)
+);
+CREATE TABLE IF NOT EXISTS public.postcodes (
+    postcode varchar(4) PRIMARY KEY,
+    suburb text,
+    state_territory_id integer REFERENCES public.states_territories(id),
+    latitude numeric(10,7),
+    longitude numeric(10,7)
+);
+"""
+
+# Rows per COPY; chunks are shared out across the worker connections
+COPY_CHUNK_ROWS = 1000
+COPY_NULL = '\\N'
+
+# Refuse to let --prune shrink a live table by more than this fraction without --force
+MAX_SHRINK = 0.1
+
+# Generous bounds covering the mainland, Tasmania and external territories
+LATITUDE_RANGE = (-55, -9)
+LONGITUDE_RANGE = (72, 169)
+
+ADVISORY_LOCK_KEY = 'disaster_scrapy.reference_loader'
+
+
+def build_reference_rows(csv_path):
+    """Return {table: rows} selected the same way scripts/process-postcodes.py selects its inserts"""
+    lgas = {}
+    postcodes = {}
+    for row in load_postcode_rows(csv_path):
+        if row['lga_code'] and row['lga_name']:
+            lgas[row['lga_code']] = row
+        # First row per postcode wins, before the state filter (as in process-postcodes.py)
+        postcodes.setdefault(row['postcode'], row)
+
+    return {
+        'states_territories': [
+            (data['id'], data['name'], abbr) for abbr, data in STATE_MAPPING.items()
+        ],
+        'lgas': [
+            (code, row['lga_name'], STATE_MAPPING[row['state']]['id'])
+            for code, row in lgas.items() if row['state'] in STATE_MAPPING
+        ],
+        'postcodes': [
+            (postcode, row['suburb'], STATE_MAPPING[row['state']]['id'], row['lat'], row['long'])
+            for postcode, row in postcodes.items() if row['state'] in STATE_MAPPING
+        ],
+    }
+
+
+class CopyStream:
+    """File-like object that encodes rows as CSV on demand for COPY ... FROM STDIN"""
+
+    def __init__(self, rows):
+        self.rows = iter(rows)
+        self.buffer = io.StringIO()
+        self.writer = csv.writer(self.buffer, lineterminator='\n')
+
+    def read(self, size=-1):
+        while size < 0 or self.buffer.tell() < size:
+            row = next(self.rows, None)
+            if row is None:
+                break
+            self.writer.writerow([COPY_NULL if value is None else value for value in row])
+
+        data = self.buffer.getvalue()
+        self.buffer.seek(0)
+        self.buffer.truncate()
+        return data
+
+
+def staging_table(table):
+    return f"{STAGING_SCHEMA}.{table}"
+
+
+def create_staging_tables(conn):
+    """(Re)create empty UNLOGGED staging tables, committed so COPY connections can see them"""
+    with conn.cursor() as cur:
+        cur.execute(f"CREATE SCHEMA IF NOT EXISTS {STAGING_SCHEMA}")
+        for table, spec in TABLES.items():
+            columns = ', '.join(f"{name} {type_}" for name, type_ in spec['columns'].items())
+            cur.execute(f"DROP TABLE IF EXISTS {staging_table(table)}")
+            cur.execute(f"CREATE UNLOGGED TABLE {staging_table(table)} ({columns})")
+    conn.commit()
+
+
+def drop_staging_tables(conn):
+    with conn.cursor() as cur:
+        for table in TABLES:
+            cur.execute(f"DROP TABLE IF EXISTS {staging_table(table)}")
+    conn.commit()
+
+
+def copy_chunks(dsn, chunks):
+    """COPY a share of the (table, rows) chunks into staging over one connection"""
+    conn = psycopg2.connect(dsn)
+    try:
+        with conn, conn.cursor() as cur:
+            for table, rows in chunks:
+                columns = ', '.join(TABLES[table]['columns'])
+                cur.copy_expert(
+                    f"COPY {staging_table(table)} ({columns}) FROM STDIN WITH (FORMAT csv, NULL '{COPY_NULL}')",
+                    CopyStream(rows)
+                )
+    finally:
+        conn.close()
+    return sum(len(rows) for _, rows in chunks)
+
+
+def load_staging(dsn, rows_by_table, workers=4):
+    """Stream every table into staging over up to `workers` parallel COPY connections
+
+    Returns (rows staged, connections used).
+    """
+    chunks = []
+    for table, rows in rows_by_table.items():
+        for start in range(0, len(rows), COPY_CHUNK_ROWS):
+            chunks.append((table, rows[start:start + COPY_CHUNK_ROWS]))
+
+    # One connection per worker, each taking every n-th chunk
+    connections = max(1, min(workers, len(chunks)))
+    shares = [chunks[i::connections] for i in range(connections)]
+    with ThreadPoolExecutor(max_workers=connections) as executor:
+        # map() re-raises the first COPY error
+        staged = sum(executor.map(copy_chunks, [dsn] * connections, shares))
+    return staged, connections
+
+
+def validate_staging(cur, prune=False, force=False):
+    """Return a list of problems that must block the swap"""
+    problems = []
+
+    def scalar(query):
+        cur.execute(query)
+        return cur.fetchone()[0]
+
+    states = staging_table('states_territories')
+    missing_states = scalar(f"SELECT {len(STATE_MAPPING)} - count(DISTINCT id) FROM {states}")
+    if missing_states:
+        problems.append(f"{missing_states} of {len(STATE_MAPPING)} states/territories missing")
+
+    for table, spec in TABLES.items():
+        key = spec['key']
+        staged = scalar(f"SELECT count(*) FROM {staging_table(table)}")
+        if not staged:
+            problems.append(f"{table}: no rows staged")
+            continue
+
+        duplicates = scalar(
+            f"SELECT count(*) FROM (SELECT {key} FROM {staging_table(table)} "
+            f"GROUP BY {key} HAVING count(*) > 1) d"
+        )
+        if duplicates:
+            problems.append(f"{table}: {duplicates} duplicate {key} values")
+
+        null_keys = scalar(f"SELECT count(*) FROM {staging_table(table)} WHERE {key} IS NULL")
+        if null_keys:
+            problems.append(f"{table}: {null_keys} rows with no {key}")
+
+        if 'state_territory_id' in spec['columns']:
+            orphans = scalar(
+                f"SELECT count(*) FROM {staging_table(table)} s "
+                f"WHERE NOT EXISTS (SELECT 1 FROM {states} st WHERE st.id = s.state_territory_id)"
+            )
+            if orphans:
+                problems.append(f"{table}: {orphans} rows with an unknown state_territory_id")
+
+        live = scalar(f"SELECT count(*) FROM public.{table}")
+        if prune and not force and live and staged < live * (1 - MAX_SHRINK):
+            problems.append(
+                f"{table}: would shrink from {live} to {staged} rows (more than {MAX_SHRINK:.0%} with --prune, use --force)"
+            )
+
+    bad_postcodes = scalar(
+        f"SELECT count(*) FROM {staging_table('postcodes')} WHERE postcode !~ '^[0-9]{{4}}$'"
+    )
+    if bad_postcodes:
+        problems.append(f"postcodes: {bad_postcodes} malformed postcodes")
+
+    bad_coordinates = scalar(
+        f"SELECT count(*) FROM {staging_table('postcodes')} "
+        f"WHERE latitude NOT BETWEEN {LATITUDE_RANGE[0]} AND {LATITUDE_RANGE[1]} "
+        f"OR longitude NOT BETWEEN {LONGITUDE_RANGE[0]} AND {LONGITUDE_RANGE[1]}"
+    )
+    if bad_coordinates:
+        problems.append(f"postcodes: {bad_coordinates} coordinates outside Australia")
+
+    return problems
+
+
+def diff_table(cur, table, samples=5):
+    """Compare a staging table against the live one: counts plus a few example keys"""
+    spec = TABLES[table]
+    key = spec['key']
+    values = [c for c in spec['columns'] if c != key]
+    changed = (
+        f"ROW({', '.join(f'l.{c}' for c in values)}) IS DISTINCT FROM "
+        f"ROW({', '.join(f's.{c}' for c in values)})"
+    )
+    joined = f"public.{table} l FULL JOIN {staging_table(table)} s ON l.{key} = s.{key}"
+
+    cur.execute(
+        f"SELECT count(*) FILTER (WHERE l.{key} IS NULL), "
+        f"count(*) FILTER (WHERE s.{key} IS NULL), "
+        f"count(*) FILTER (WHERE l.{key} IS NOT NULL AND s.{key} IS NOT NULL AND {changed}) "
+        f"FROM {joined}"
+    )
+    added, removed, updated = cur.fetchone()
+
+    diff = {'added': added, 'removed': removed, 'updated': updated, 'examples': []}
+    if samples:
+        cur.execute(
+            f"SELECT CASE WHEN l.{key} IS NULL THEN '+' WHEN s.{key} IS NULL THEN '-' ELSE '~' END, "
+            f"COALESCE(s.{key}, l.{key})::text, "
+            f"ROW({', '.join(f'l.{c}' for c in values)})::text, "
+            f"ROW({', '.join(f's.{c}' for c in values)})::text "
+            f"FROM {joined} WHERE l.{key} IS NULL OR s.{key} IS NULL OR {changed} "
+            f"ORDER BY 2 LIMIT %s",
+            (samples,)
+        )
+        diff['examples'] = cur.fetchall()
+    return diff
+
+
+def merge_table(cur, table):
+    """Update changed and insert new live rows from staging; returns (updated, inserted)"""
+    spec = TABLES[table]
+    key = spec['key']
+    columns = list(spec['columns'])
+    values = [c for c in columns if c != key]
+
+    cur.execute(
+        f"UPDATE public.{table} l SET {', '.join(f'{c} = s.{c}' for c in values)} "
+        f"FROM {staging_table(table)} s WHERE l.{key} = s.{key} "
+        f"AND ROW({', '.join(f'l.{c}' for c in values)}) IS DISTINCT FROM "
+        f"ROW({', '.join(f's.{c}' for c in values)})"
+    )
+    updated = cur.rowcount
+
+    cur.execute(
+        f"INSERT INTO public.{table} ({', '.join(columns)}) "
+        f"SELECT {', '.join(f's.{c}' for c in columns)} FROM {staging_table(table)} s "
+        f"WHERE NOT EXISTS (SELECT 1 FROM public.{table} l WHERE l.{key} = s.{key})"
+    )
+    return updated, cur.rowcount
+
+
+def prune_table(cur, table):
+    """Delete live rows that are not in staging; returns the number deleted"""
+    key = TABLES[table]['key']
+    cur.execute(
+        f"DELETE FROM public.{table} l "
+        f"WHERE NOT EXISTS (SELECT 1 FROM {staging_table(table)} s WHERE s.{key} = l.{key})"
+    )
+    return cur.rowcount
+
+
+def swap_in(conn, prune=False):
+    """Merge every staging table into the live tables in one transaction"""
+    results = {}
+    with conn, conn.cursor() as cur:
+        # Readers carry on against the old rows; concurrent writers wait for the commit
+        cur.execute(
+            f"LOCK TABLE {', '.join(f'public.{t}' for t in TABLES)} IN SHARE ROW EXCLUSIVE MODE"
+        )
+        for table in TABLES:
+            results[table] = merge_table(cur, table) + (0,)
+        if prune:
+            # Children first so a removed LGA/postcode never blocks a removed state
+            for table in reversed(list(TABLES)):
+                results[table] = results[table][:2] + (prune_table(cur, table),)
+        log_import(cur, results)
+    return results
+
+
+def log_import(cur, results):
+    """Record the refresh in data_import_logs when that table exists"""
+    cur.execute("SELECT to_regclass('public.data_import_logs')")
+    if cur.fetchone()[0] is None:
+        return
+    cur.execute(
+        "INSERT INTO public.data_import_logs "
+        "(import_type, records_imported, records_updated, import_status, completed_at, metadata) "
+        "VALUES ('reference_data', %s, %s, 'completed', now(), %s)",
+        (
+            sum(r[1] for r in results.values()),
+            sum(r[0] for r in results.values()),
+            psycopg2.extras.Json({
+                table: {'updated': u, 'inserted': i, 'deleted': d}
+                for table, (u, i, d) in results.items()
+            }),
+        )
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load states, LGAs and postcodes into Postgres via staging tables")
+    parser.add_argument('csv', nargs='?', default='australian_postcodes.csv', help="australian_postcodes.csv")
+    parser.add_argument('--dsn', default=os.environ.get('DATABASE_URL'),
+                        help="Postgres connection string (default: $DATABASE_URL)")
+    parser.add_argument('--workers', type=int, default=4, help="Parallel COPY connections")
+    parser.add_argument('--dry-run', action='store_true', help="Stage, validate and print the diff without changing live tables")
+    parser.add_argument('--prune', action='store_true', help="Delete live rows that are no longer in the CSV")
+    parser.add_argument('--force', action='store_true', help=f"Allow --prune to shrink a table by more than {MAX_SHRINK:.0%}")
+    parser.add_argument('--samples', type=int, default=5, help="Example rows to show per table in the diff")
+    parser.add_argument('--create-tables', action='store_true', help="Create minimal live tables if missing (local testing)")
+    parser.add_argument('--keep-staging', action='store_true', help="Leave the staging tables in place for inspection")
+    args = parser.parse_args(argv)
+
+    if not args.dsn:
+        parser.error("pass --dsn or set DATABASE_URL")
+
+    started = time.perf_counter()
+    rows_by_table = build_reference_rows(args.csv)
+    print(
+        f"📄 {args.csv}: {len(rows_by_table['states_territories'])} states/territories, "
+        f"{len(rows_by_table['lgas'])} LGAs, {len(rows_by_table['postcodes'])} unique postcodes"
+    )
+
+    conn = psycopg2.connect(args.dsn)
+    holds_lock = False
+    try:
+        with conn.cursor() as cur:
+            # Session-level lock: one loader at a time owns the staging schema
+            cur.execute("SELECT pg_try_advisory_lock(hashtext(%s))", (ADVISORY_LOCK_KEY,))
+            holds_lock = cur.fetchone()[0]
+            if not holds_lock:
+                print("❌ Another reference load is already running")
+                return 1
+            if args.create_tables:
+                cur.execute(LOCAL_SCHEMA)
+        conn.commit()
+
+        create_staging_tables(conn)
+        staged, connections = load_staging(args.dsn, rows_by_table, workers=args.workers)
+        print(f"📥 Staged {staged} rows over {connections} COPY connections ({time.perf_counter() - started:.1f}s)")
+
+        with conn.cursor() as cur:
+            problems = validate_staging(cur, prune=args.prune, force=args.force)
+            diffs = {table: diff_table(cur, table, samples=args.samples) for table in TABLES}
+        conn.rollback()
+
+        print("="*80)
+        print("REFERENCE DATA DIFF (live -> staged):")
+        for table, diff in diffs.items():
+            print(f"  {table:<20} +{diff['added']:<6} -{diff['removed']:<6} ~{diff['updated']}")
+            for change, key, before, after in diff['examples']:
+                print(f"      {change} {key}: {before if change != '+' else ''} -> {after if change != '-' else ''}")
+        print("="*80)
+
+        if problems:
+            print("❌ Validation failed, live tables not changed:")
+            for problem in problems:
+                print(f"  - {problem}")
+            return 1
+
+        if args.dry_run:
+            print(f"✅ Dry run OK, live tables not changed ({time.perf_counter() - started:.1f}s)")
+            return 0
+
+        results = swap_in(conn, prune=args.prune)
+        for table, (updated, inserted, deleted) in results.items():
+            print(f"  {table:<20} {inserted} inserted, {updated} updated, {deleted} deleted")
+        print(f"✅ Reference data swapped in ({time.perf_counter() - started:.1f}s)")
+        return 0
+    finally:
+        # Only the lock holder may touch staging; another loader may be filling it
+        if holds_lock and not args.keep_staging:
+            conn.rollback()
+            drop_staging_tables(conn)
+        conn.close()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -55,6 +55,31 @@ DOWNLOAD_DELAY = 1
 #EXTENSIONS = {
 #    "scrapy.extensions.telnet.TelnetConsole": None,
 #}
+EXTENSIONS = {
+    "disaster_scrapy.profiler.ProfilerExtension": 500,
+}
+
+# Sampling profiler, only active when a spider is run with -a profile=1
+PROFILE_INTERVAL = 0.005  # seconds between stack samples
+PROFILE_TOP_N = 20
+PROFILE_DIR = "profiles"
+PROFILE_CALLBACKS = ["parse", "parse_disaster"]
+
+# Detail page parser backend: "parsel" (default) or "lxml", see parsers.py.
+# Override per run with -a parser=lxml
+PARSER_BACKEND = "parsel"
+
+# Max detail pages queued to the extraction pool when run with -a workers=N
+# (0 = 2 per worker), see offload.py
+OFFLOAD_MAX_IN_FLIGHT = 0
+
+# PersistentDupeFilter: skip disasters scraped by a recent run, see dupefilters.py
+DUPEFILTER_AGRN_TTL = 6 * 3600  # seconds before a disaster detail page is refetched
+DUPEFILTER_PERSIST = True  # False dedupes within the run only
+
+# Parquet snapshot export (ParquetExportPipeline), partitioned by scrape date
+SNAPSHOT_DIR = "snapshots"
+SNAPSHOT_BATCH_SIZE = 500  # disasters buffered per Parquet write
 
 # Configure item pipelines
 # See https://docs.scrapy.org/en/latest/topics/item-pipeline.html
@@ -0,0 +1,5 @@
+# Project-specific Scrapy signals
+
+# Sent by SupabasePipeline when a disaster could not be written (args: item, spider, error).
+# The item still continues down the pipeline, so item_scraped fires for it as well.
+item_save_failed = object()
@@ -0,0 +1,202 @@
+# Columnar (Parquet) snapshots of every crawl
+#
+# ParquetExportPipeline writes three hive-partitioned datasets per run:
+#
+#   <SNAPSHOT_DIR>/disasters/scrape_date=YYYY-MM-DD/*.parquet     one row per disaster
+#   <SNAPSHOT_DIR>/disaster_lgas/scrape_date=YYYY-MM-DD/*.parquet one row per disaster x LGA
+#   <SNAPSHOT_DIR>/quick_info/scrape_date=YYYY-MM-DD/*.parquet    one row per disaster x quick-info field
+#
+# read_snapshots() queries across runs, e.g.
+#
+#   read_snapshots('snapshots', 'disaster_lgas', since='2025-01-01',
+#                  columns=['agrn_reference', 'lga_name', 'scrape_date'])
+import json
+import os
+from datetime import date, datetime
+
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+
+DISASTERS_SCHEMA = pa.schema([
+    ('run_id', pa.string()),
+    ('agrn_reference', pa.string()),
+    ('event_name', pa.string()),
+    ('disaster_type', pa.string()),
+    ('state_code', pa.string()),
+    ('declaration_date', pa.date32()),
+    ('expiry_date', pa.date32()),
+    ('is_active', pa.bool_()),
+    ('lga_count', pa.int32()),
+    ('all_lgas', pa.list_(pa.string())),
+    ('quick_info', pa.map_(pa.string(), pa.string())),
+    ('assistance_details', pa.string()),  # JSON, shape varies per page
+    ('source', pa.string()),
+    ('source_url', pa.string()),
+    ('page_title', pa.string()),
+    ('description', pa.string()),
+    ('checksum', pa.string()),
+    ('scraped_at', pa.timestamp('us')),
+])
+
+LGAS_SCHEMA = pa.schema([
+    ('run_id', pa.string()),
+    ('agrn_reference', pa.string()),
+    ('state_code', pa.string()),
+    ('lga_name', pa.string()),
+    ('is_active', pa.bool_()),
+    ('scraped_at', pa.timestamp('us')),
+])
+
+QUICK_INFO_SCHEMA = pa.schema([
+    ('run_id', pa.string()),
+    ('agrn_reference', pa.string()),
+    ('field', pa.string()),
+    ('value', pa.string()),
+    ('scraped_at', pa.timestamp('us')),
+])
+
+TABLES = {
+    'disasters': DISASTERS_SCHEMA,
+    'disaster_lgas': LGAS_SCHEMA,
+    'quick_info': QUICK_INFO_SCHEMA,
+}
+
+
+def parse_iso_date(value):
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(value[:10])
+    except ValueError:
+        return None
+
+
+def parse_iso_timestamp(value):
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        return None
+
+
+def explode_item(item, run_id):
+    """Split one scraped disaster into rows for each snapshot table"""
+    scraped_at = parse_iso_timestamp(item.get('scraped_at'))
+    is_active = not item.get('expiry_date') and item.get('declaration_status', 'active') == 'active'
+    all_lgas = list(item.get('all_lgas') or [])
+    quick_info = dict(item.get('quick_info') or {})
+
+    disaster = {
+        'run_id': run_id,
+        'agrn_reference': item.get('agrn_reference'),
+        'event_name': item.get('event_name'),
+        'disaster_type': item.get('disaster_type'),
+        'state_code': item.get('state_code'),
+        'declaration_date': parse_iso_date(item.get('declaration_date')),
+        'expiry_date': parse_iso_date(item.get('expiry_date')),
+        'is_active': is_active,
+        'lga_count': item.get('lga_count', len(all_lgas)),
+        'all_lgas': all_lgas,
+        'quick_info': list(quick_info.items()),
+        'assistance_details': json.dumps(item.get('assistance_details') or {}, sort_keys=True),
+        'source': item.get('source') or 'disasterassist.gov.au',
+        'source_url': item.get('source_url'),
+        'page_title': item.get('page_title'),
+        'description': item.get('description'),
+        'checksum': item.get('checksum'),
+        'scraped_at': scraped_at,
+    }
+    lgas = [{
+        'run_id': run_id,
+        'agrn_reference': disaster['agrn_reference'],
+        'state_code': disaster['state_code'],
+        'lga_name': lga,
+        'is_active': is_active,
+        'scraped_at': scraped_at,
+    } for lga in all_lgas]
+    quick = [{
+        'run_id': run_id,
+        'agrn_reference': disaster['agrn_reference'],
+        'field': field,
+        'value': value,
+        'scraped_at': scraped_at,
+    } for field, value in quick_info.items()]
+
+    return {'disasters': [disaster], 'disaster_lgas': lgas, 'quick_info': quick}
+
+
+class SnapshotWriter:
+    """Buffer exploded rows and flush them as Parquet files per scrape date"""
+
+    def __init__(self, base_dir, run_id, batch_size=500, compression='zstd'):
+        self.base_dir = base_dir
+        self.run_id = run_id
+        self.batch_size = batch_size
+        self.compression = compression
+        self.buffers = {name: {} for name in TABLES}  # table -> scrape_date -> rows
+        self.pending = 0
+        self.batches_written = 0
+        self.rows_written = {name: 0 for name in TABLES}
+        self.files = []
+
+    def add(self, item):
+        scrape_date = (item.get('scraped_at') or datetime.now().isoformat())[:10]
+        for table, rows in explode_item(item, self.run_id).items():
+            self.buffers[table].setdefault(scrape_date, []).extend(rows)
+        self.pending += 1
+        if self.pending >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self.pending:
+            return
+        for table, by_date in self.buffers.items():
+            for scrape_date, rows in by_date.items():
+                if rows:
+                    self._write(table, scrape_date, rows)
+            by_date.clear()
+        self.pending = 0
+        self.batches_written += 1
+
+    def _write(self, table, scrape_date, rows):
+        partition = os.path.join(self.base_dir, table, f"scrape_date={scrape_date}")
+        os.makedirs(partition, exist_ok=True)
+        path = os.path.join(partition, f"{self.run_id}-{self.batches_written:05d}.parquet")
+
+        pq.write_table(
+            pa.Table.from_pylist(rows, schema=TABLES[table]),
+            path,
+            compression=self.compression
+        )
+        self.rows_written[table] += len(rows)
+        self.files.append(path)
+
+
+def read_snapshots(base_dir, table='disasters', columns=None, where=None, since=None, until=None):
+    """Read a snapshot table across runs as a pyarrow Table
+
+    since/until are inclusive YYYY-MM-DD scrape dates and prune partitions
+    before any file is opened. where is an optional pyarrow.dataset
+    expression, e.g. ds.field('state_code') == 'QLD'.
+    """
+    dataset = ds.dataset(
+        os.path.join(base_dir, table),
+        format='parquet',
+        schema=TABLES[table].append(pa.field('scrape_date', pa.string())),
+        partitioning=ds.partitioning(pa.schema([('scrape_date', pa.string())]), flavor='hive')
+    )
+
+    clauses = [where] if where is not None else []
+    if since:
+        clauses.append(ds.field('scrape_date') >= str(since))
+    if until:
+        clauses.append(ds.field('scrape_date') <= str(until))
+
+    expression = None
+    for clause in clauses:
+        expression = clause if expression is None else expression & clause
+
+    return dataset.to_table(columns=columns, filter=expression)
@@ -0,0 +1,95 @@
+# Disaster declaration sources crawled by run_sources
+#
+# The federal list (disasterassist.gov.au) is the primary source. The state
+# sites mirror STATE_SOURCES in supabase/functions/state-declarations-sync and
+# only add AGRNs the federal list does not already have.
+#
+# concurrency/delay become per-domain DOWNLOAD_SLOTS, so each source keeps
+# its own politeness budget no matter how many run in the same process.
+from urllib.parse import urlparse
+
+
+PRIMARY_SOURCE = 'disasterassist'
+
+SOURCES = {
+    'disasterassist': {
+        'url': 'https://www.disasterassist.gov.au/find-a-disaster/australian-disasters',
+        'name': 'DisasterAssist (Australian Government)',
+        'state': None,
+        'concurrency': 1,
+        'delay': 2,
+    },
+    'NSW': {
+        'url': 'https://emergencymanagement.nsw.gov.au/en/disasters',
+        'name': 'NSW Emergency Management',
+        'state': 'NSW',
+        'concurrency': 2,
+        'delay': 1,
+    },
+    'VIC': {
+        'url': 'https://www.vic.gov.au/emergencies',
+        'name': 'Emergency Management Victoria',
+        'state': 'VIC',
+        'concurrency': 2,
+        'delay': 1,
+    },
+    'QLD': {
+        'url': 'https://disaster.qld.gov.au',
+        'name': 'Queensland Disaster Management',
+        'state': 'QLD',
+        'concurrency': 2,
+        'delay': 1,
+    },
+    'WA': {
+        'url': 'https://emergency.wa.gov.au',
+        'name': 'Emergency WA',
+        'state': 'WA',
+        'concurrency': 2,
+        'delay': 1,
+    },
+    'SA': {
+        'url': 'https://www.sa.gov.au/topics/emergencies-and-safety',
+        'name': 'South Australia Emergency',
+        'state': 'SA',
+        'concurrency': 2,
+        'delay': 1,
+    },
+    'TAS': {
+        'url': 'https://www.ses.tas.gov.au',
+        'name': 'Tasmania SES',
+        'state': 'TAS',
+        'concurrency': 2,
+        'delay': 1,
+    },
+    'NT': {
+        'url': 'https://securent.nt.gov.au',
+        'name': 'Northern Territory Emergency',
+        'state': 'NT',
+        'concurrency': 2,
+        'delay': 1,
+    },
+    'ACT': {
+        'url': 'https://esa.act.gov.au',
+        'name': 'ACT Emergency Services',
+        'state': 'ACT',
+        'concurrency': 2,
+        'delay': 1,
+    },
+}
+
+
+def source_domain(key):
+    """Return the bare domain of a source, used as the item source tag"""
+    host = urlparse(SOURCES[key]['url']).hostname
+    return host[4:] if host.startswith('www.') else host
+
+
+def download_slots(keys):
+    """Build DOWNLOAD_SLOTS entries giving every source its own budget"""
+    slots = {}
+    for key in keys:
+        source = SOURCES[key]
+        host = urlparse(source['url']).hostname
+        for domain in {host, source_domain(key), f"www.{source_domain(key)}"}:
+            slots[domain] = {'concurrency': source['concurrency'], 'delay': source['delay']}
+    return slots
@@ -1,30 +1,40 @@
 import scrapy
+from scrapy.utils.defer import maybe_deferred_to_future
 import hashlib
 import os
 from datetime import datetime
 import json
 
+from disaster_scrapy.offload import ExtractionPool
+from disaster_scrapy.parsers import get_backend
+
 class DisasterSpider(scrapy.Spider):
     name = 'disasters_medicare'
     allowed_domains = ['disasterassist.gov.au']
     start_urls = ['https://www.disasterassist.gov.au/find-a-disaster/australian-disasters']
+    source_system = 'Scrapy Primary v1'
     
     custom_settings = {
         'DOWNLOAD_DELAY': 2,
         'CONCURRENT_REQUESTS': 1,
         'RETRY_TIMES': 5,
-        'DUPEFILTER_CLASS': 'scrapy.dupefilters.RFPDupeFilter',
+        'DUPEFILTER_CLASS': 'disaster_scrapy.dupefilters.PersistentDupeFilter',
         'LOG_LEVEL': 'INFO',
         'USER_AGENT': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36',
         'ITEM_PIPELINES': {
             'disaster_scrapy.pipelines.ValidationPipeline': 100,
             'disaster_scrapy.pipelines.SupabasePipeline': 200,
             'disaster_scrapy.pipelines.AuditPipeline': 300,
+            'disaster_scrapy.pipelines.ParquetExportPipeline': 400,
         }
     }
     
-    def __init__(self, mode='full', *args, **kwargs):
+    def __init__(self, mode='full', parser=None, workers=0, *args, **kwargs):
         super().__init__(*args, **kwargs)
+        self.parser_name = parser  # Detail page parser backend, see parsers.py
+        self.parser_backend = None
+        self.workers = int(workers)  # >0 extracts detail pages in a process pool, see offload.py
+        self.extraction_pool = None
         self.disasters_found = set()
         self.pages_crawled = 0
         self.mode = mode  # 'full' or 'rescrape' (only those without end dates)
@@ -34,6 +44,20 @@ class DisasterSpider(scrapy.Spider):
         if self.mode == 'rescrape':
             self.load_existing_disasters()
     
+    @classmethod
+    def from_crawler(cls, crawler, *args, **kwargs):
+        spider = super().from_crawler(crawler, *args, **kwargs)
+        spider.parser_name = spider.parser_name or crawler.settings.get('PARSER_BACKEND', 'parsel')
+        spider.parser_backend = get_backend(spider.parser_name)
+        
+        if spider.workers > 0:
+            spider.extraction_pool = ExtractionPool(
+                cls, spider.workers, spider.parser_name,
+                crawler.settings.getint('OFFLOAD_MAX_IN_FLIGHT') or None
+            )
+            spider.logger.info(f"Extracting detail pages in {spider.workers} worker processes")
+        return spider
+    
     def load_existing_disasters(self):
         """Load existing disasters with end dates to skip during rescrape"""
         from supabase import create_client
@@ -112,7 +136,7 @@ class DisasterSpider(scrapy.Spider):
                 # Extract to detail page
                 yield response.follow(
                     detail_link, 
-                    self.parse_disaster,
+                    self.parse_disaster_offloaded if self.extraction_pool else self.parse_disaster,
                     meta={
                         'start_date': cells[0] if len(cells) > 0 else None,
                         'end_date': cells[1] if len(cells) > 1 else None,
@@ -120,8 +144,7 @@ class DisasterSpider(scrapy.Spider):
                         'type': cells[3] if len(cells) > 3 else None,
                         'name': cells[4] if len(cells) > 4 else None,
                         'agrn': agrn.replace('AGRN-', '').replace(',', '')
-                    },
-                    dont_filter=True  # Always follow even if seen before
+                    }
                 )
         
         self.logger.info(f"Found {disasters_on_page} disasters on page ({new_disasters} new)")
@@ -140,7 +163,6 @@ class DisasterSpider(scrapy.Spider):
             yield scrapy.Request(
                 next_url,
                 callback=self.parse,
-                dont_filter=True,  # IMPORTANT: Allow revisiting URLs
                 meta={'page_num': self.pages_crawled}
             )
         
@@ -151,31 +173,41 @@ class DisasterSpider(scrapy.Spider):
         
         if next_link and self.pages_crawled < 50:
             self.logger.info(f"Also following Next link: {next_link}")
-            yield response.follow(next_link, self.parse, dont_filter=True)
+            yield response.follow(next_link, self.parse)
     
     def parse_disaster(self, response):
         """Extract complete disaster details"""
         self.logger.info(f"Parsing disaster: {response.meta.get('name', 'Unknown')}")
+        disaster = self.extract_disaster(response)
+        self.logger.info(f"✅ Extracted {disaster['agrn_reference']} with {disaster['lga_count']} LGAs")
+        yield disaster
+    
+    async def parse_disaster_offloaded(self, response):
+        """Extract complete disaster details in a worker process"""
+        disaster = await maybe_deferred_to_future(self.extraction_pool.extract(response))
+        self.logger.info(f"✅ Extracted {disaster['agrn_reference']} with {disaster['lga_count']} LGAs (worker)")
+        yield disaster
+    
+    def extract_disaster(self, response):
+        """Build the disaster record for a detail page (also runs in worker processes)"""
+        fields = self.parser_backend.extract_detail(response)
         
         # Extract ALL LGAs from lists
         all_lgas = []
         
         # Strategy 1: Look for UL lists
-        for ul in response.css('ul'):
-            items = ul.css('li::text').getall()
-            for item in items:
-                if self.is_likely_lga(item.strip()):
-                    all_lgas.append(item.strip())
+        for item in fields['list_items']:
+            if self.is_likely_lga(item.strip()):
+                all_lgas.append(item.strip())
         
         # Strategy 2: Look for specific content areas
-        content_areas = response.css('.content-area li::text').getall()
-        for item in content_areas:
+        for item in fields['content_items']:
             if self.is_likely_lga(item.strip()):
                 all_lgas.append(item.strip())
         
         # Extract assistance details
         assistance_details = {}
-        paragraphs = response.css('p::text').getall()
+        paragraphs = fields['paragraphs']
         for para in paragraphs:
             if '$1000' in para and 'adult' in para.lower():
                 assistance_details['agdrp_payment'] = {
@@ -187,18 +219,18 @@ class DisasterSpider(scrapy.Spider):
         
         # Extract quick info
         quick_info = {}
-        dt_elements = response.css('dt::text').getall()
-        dd_elements = response.css('dd::text').getall()
+        dt_elements = fields['dt']
+        dd_elements = fields['dd']
         for i, dt in enumerate(dt_elements):
             if i < len(dd_elements):
                 quick_info[dt.strip()] = dd_elements[i].strip()
         
-        # Build disaster record
-        unique_lgas = list(set(all_lgas))
+        # Build disaster record (first-seen order keeps output stable across runs)
+        unique_lgas = list(dict.fromkeys(all_lgas))
         
         disaster = {
             'agrn_reference': f"AGRN-{response.meta['agrn'].replace(',', '')}",
-            'event_name': response.meta.get('name') or response.css('h1::text').get(),
+            'event_name': response.meta.get('name') or fields['h1'],
             'disaster_type': self.map_disaster_type(response.meta.get('type')),
             'state_code': self.map_state_code(response.meta.get('state')),
             'declaration_date': self.parse_date(response.meta.get('start_date')),
@@ -207,16 +239,16 @@ class DisasterSpider(scrapy.Spider):
             'lga_count': len(unique_lgas),
             'assistance_details': assistance_details,
             'quick_info': quick_info,
+            'source': self.allowed_domains[0],
             'source_url': response.url,
             'scraped_at': datetime.now().isoformat(),
-            'checksum': hashlib.md5(response.text.encode()).hexdigest(),
-            'page_title': response.css('title::text').get(),
+            # Hash the raw bytes, decoding the whole page just to re-encode it is wasted work
+            'checksum': hashlib.md5(response.body).hexdigest(),
+            'page_title': fields['title'],
             'description': '\n\n'.join(paragraphs[:3]) if paragraphs else None
         }
         
-        self.logger.info(f"✅ Extracted {disaster['agrn_reference']} with {disaster['lga_count']} LGAs")
-        
-        yield disaster
+        return disaster
     
     def is_likely_lga(self, text):
         """Check if text is likely an LGA name"""
@@ -338,4 +370,7 @@ class DisasterSpider(scrapy.Spider):
         self.logger.info(f"SPIDER COMPLETED: {reason}")
         self.logger.info(f"Pages crawled: {self.pages_crawled}")
         self.logger.info(f"Unique disasters found: {len(self.disasters_found)}")
+        if self.extraction_pool:
+            self.logger.info(f"Pages extracted by workers: {self.extraction_pool.submitted}")
+            self.extraction_pool.shutdown()
         self.logger.info("="*80)
\ No newline at end of file
@@ -0,0 +1,140 @@
+import re
+import hashlib
+from datetime import datetime
+
+from disaster_scrapy.sources import SOURCES, source_domain
+from disaster_scrapy.spiders.disasters import DisasterSpider
+
+
+AGRN_PATTERN = re.compile(r'AGRN[\s\-:#]*(\d[\d,]*)', re.IGNORECASE)
+FOLLOW_KEYWORDS = ('disaster', 'declar', 'recovery', 'emergenc', 'flood', 'fire', 'cyclone', 'storm', 'assistance')
+
+
+class StateDeclarationSpider(DisasterSpider):
+    """Crawl a state emergency site for AGRN-referenced declarations
+
+    Run one per source, e.g. scrapy crawl state_declarations -a source=QLD,
+    or all of them at once with python -m disaster_scrapy.run_sources.
+    Shares DisasterSpider's pipelines and LGA/date/type helpers.
+    """
+    name = 'state_declarations'
+    source_system = 'Scrapy State v1'
+
+    custom_settings = dict(DisasterSpider.custom_settings, **{
+        'DOWNLOAD_DELAY': 1,
+        'CONCURRENT_REQUESTS': 2,
+        'DEPTH_LIMIT': 2,
+        'CLOSESPIDER_PAGECOUNT': 200,
+    })
+
+    def __init__(self, source=None, mode='full', *args, **kwargs):
+        if source not in SOURCES or not SOURCES[source]['state']:
+            states = ', '.join(k for k, s in SOURCES.items() if s['state'])
+            raise ValueError(f"source must be one of: {states}")
+
+        kwargs.setdefault('name', f"{self.name}_{source.lower()}")
+        super().__init__(mode, *args, **kwargs)
+        self.source = source
+        self.source_config = SOURCES[source]
+        self.audit_tag = source.lower()
+        self.start_urls = [self.source_config['url']]
+        self.allowed_domains = [source_domain(source)]
+        self.pages_followed = set()
+
+    def parse(self, response):
+        """Extract AGRN declarations from a page and follow likely declaration links"""
+        self.pages_crawled += 1
+        self.logger.info(f"PARSING {self.source} PAGE {self.pages_crawled}: {response.url}")
+
+        if not hasattr(response, 'text'):
+            return
+
+        yield from self.parse_declarations(response)
+
+        for link in response.css('a'):
+            href = link.attrib.get('href')
+            if not href or href.startswith(('mailto:', 'tel:', '#')):
+                continue
+
+            label = ' '.join(link.css('::text').getall()).lower()
+            if not any(k in label or k in href.lower() for k in FOLLOW_KEYWORDS):
+                continue
+
+            url = response.urljoin(href).split('#')[0]
+            if url in self.pages_followed:
+                continue
+            self.pages_followed.add(url)
+            yield response.follow(url, self.parse)
+
+    def parse_declarations(self, response):
+        """Build a disaster record for each new AGRN mentioned on the page"""
+        for node in response.xpath('//*[contains(translate(text(), "agrn", "AGRN"), "AGRN")]'):
+            match = AGRN_PATTERN.search(' '.join(node.css('::text').getall()))
+            if not match:
+                continue
+
+            agrn_key = f"AGRN-{match.group(1).replace(',', '')}"
+            if agrn_key in self.disasters_found:
+                continue
+            if self.mode == 'rescrape' and agrn_key in self.existing_with_end_dates:
+                self.logger.info(f"  Skipping (has end date): {agrn_key}")
+                continue
+            self.disasters_found.add(agrn_key)
+
+            # The AGRN's own block; a section would also hold other declarations
+            container = node.xpath(
+                'ancestor-or-self::*[self::p or self::tr or self::li or self::article][1]'
+            ) or [node]
+            container = container[0]
+
+            text = ' '.join(t.strip() for t in container.css('::text').getall() if t.strip())
+            title = container.css('h1::text, h2::text, h3::text, h4::text, a::text').get()
+
+            all_lgas = []
+            for item in self.following_list_items(node, container):
+                if self.is_likely_lga(item.strip()):
+                    all_lgas.append(item.strip())
+            unique_lgas = list(dict.fromkeys(all_lgas))
+
+            disaster = {
+                'agrn_reference': agrn_key,
+                'event_name': (title or text[:200]).strip(),
+                'disaster_type': self.map_disaster_type(text),
+                'state_code': self.source_config['state'],
+                'declaration_date': None,
+                'expiry_date': None,
+                # Any AGRN on the page (news, archives) lands here, so it is only
+                # a lead (disaster_declaration_leads) until the federal list has it
+                'declaration_status': 'unverified',
+                'all_lgas': unique_lgas,
+                'lga_count': len(unique_lgas),
+                'assistance_details': {},
+                'quick_info': {},
+                'source': self.allowed_domains[0],
+                'source_url': response.url,
+                'scraped_at': datetime.now().isoformat(),
+                'checksum': hashlib.md5(container.get().encode()).hexdigest(),
+                'page_title': response.css('title::text').get(),
+                'description': text[:1000] or None
+            }
+
+            self.logger.info(f"✅ Extracted {agrn_key} from {self.source_config['name']} with {len(unique_lgas)} LGAs")
+            yield disaster
+
+    def following_list_items(self, node, container):
+        """li texts after the AGRN inside its block, stopping at the next AGRN mentioned there"""
+        node_el = node.root
+        items = []
+        started = False
+        for el in container.root.iter():
+            if el is node_el:
+                started = True
+                continue
+            if not started or not isinstance(el.tag, str):
+                continue
+            own_text = el.xpath('text()')
+            if el.tag == 'li':
+                items.extend(own_text)
+            if AGRN_PATTERN.search(' '.join(own_text)):
+                break
+        return items
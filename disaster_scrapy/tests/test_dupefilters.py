@@ -0,0 +1,122 @@
+import os
+import tempfile
+import unittest
+
+from scrapy import Spider, signals
+from scrapy.downloadermiddlewares.redirect import RedirectMiddleware
+from scrapy.http import HtmlResponse, Request, Response
+from scrapy.utils.test import get_crawler
+
+from disaster_scrapy.dupefilters import PersistentDupeFilter
+from disaster_scrapy.signals import item_save_failed
+
+
+DETAIL_URL = 'https://www.disasterassist.gov.au/find-a-disaster/australian-disasters/1234'
+MOVED_URL = 'https://www.disasterassist.gov.au/disasters/1234'
+OTHER_DETAIL_URL = 'https://www.disasterassist.gov.au/find-a-disaster/australian-disasters/5678'
+LISTING_URL = 'https://www.disasterassist.gov.au/find-a-disaster/australian-disasters?page=1'
+
+
+class DupeFilterTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.cwd = os.getcwd()
+        self.tmp = tempfile.TemporaryDirectory()
+        os.chdir(self.tmp.name)
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        self.tmp.cleanup()
+
+    def make_filter(self, **settings):
+        crawler = get_crawler(Spider, settings)
+        crawler.spider = crawler._create_spider('disasters_test')
+        dupefilter = PersistentDupeFilter.from_crawler(crawler)
+        dupefilter.open()
+        return crawler, dupefilter
+
+    def detail_request(self, url=DETAIL_URL):
+        return Request(url, meta={'agrn': '1,234', 'name': 'Test Floods'})
+
+    def test_redirected_detail_request_is_not_filtered(self):
+        crawler, dupefilter = self.make_filter(DUPEFILTER_PERSIST=False)
+        request = self.detail_request()
+        self.assertFalse(dupefilter.request_seen(request))
+
+        redirect = RedirectMiddleware.from_crawler(crawler)
+        response = Response(DETAIL_URL, status=301, headers={'Location': MOVED_URL})
+        redirected = redirect.process_response(request, response)
+
+        self.assertEqual(redirected.meta['agrn'], '1,234')
+        self.assertFalse(redirected.dont_filter)
+        self.assertFalse(dupefilter.request_seen(redirected))
+
+    def test_same_agrn_from_another_listing_is_filtered(self):
+        _, dupefilter = self.make_filter(DUPEFILTER_PERSIST=False)
+        self.assertFalse(dupefilter.request_seen(self.detail_request()))
+        self.assertTrue(dupefilter.request_seen(self.detail_request(DETAIL_URL + '?from=page2')))
+
+    def test_scraped_disaster_is_suppressed_next_run(self):
+        crawler, dupefilter = self.make_filter()
+        request = self.detail_request()
+        dupefilter.request_seen(request)
+        dupefilter.item_scraped({'agrn_reference': 'AGRN-1234'},
+                                HtmlResponse(DETAIL_URL, body=b'', request=request), crawler.spider)
+        dupefilter.close('finished')
+
+        _, dupefilter = self.make_filter()
+        self.assertTrue(dupefilter.request_seen(self.detail_request()))
+
+    def test_failed_save_is_not_persisted(self):
+        crawler, dupefilter = self.make_filter()
+        request = self.detail_request()
+        dupefilter.request_seen(request)
+        item = {'agrn_reference': 'AGRN-1234'}
+        # As SupabasePipeline does on a DB error; the item is still scraped afterwards
+        crawler.signals.send_catch_log(item_save_failed, item=item, spider=crawler.spider, error='timeout')
+        crawler.signals.send_catch_log(
+            signals.item_scraped, item=item, spider=crawler.spider,
+            response=HtmlResponse(DETAIL_URL, body=b'', request=request)
+        )
+        dupefilter.close('finished')
+
+        _, dupefilter = self.make_filter()
+        self.assertFalse(dupefilter.request_seen(self.detail_request()))
+
+    def test_fetched_detail_without_item_is_not_persisted(self):
+        crawler, dupefilter = self.make_filter()
+        dupefilter.request_seen(self.detail_request())
+        dupefilter.close('finished')
+
+        _, dupefilter = self.make_filter()
+        self.assertFalse(dupefilter.request_seen(self.detail_request()))
+
+    def test_listing_pages_are_refetched_next_run(self):
+        crawler, dupefilter = self.make_filter()
+        listing = Request(LISTING_URL)
+        self.assertFalse(dupefilter.request_seen(listing))
+        self.assertTrue(dupefilter.request_seen(Request(LISTING_URL)))
+        crawler.signals.send_catch_log(
+            signals.response_received, request=listing, spider=crawler.spider,
+            response=HtmlResponse(LISTING_URL, body=b'', request=listing)
+        )
+
+        scraped = self.detail_request()
+        dupefilter.request_seen(scraped)
+        dupefilter.item_scraped({'agrn_reference': 'AGRN-1234'},
+                                HtmlResponse(DETAIL_URL, body=b'', request=scraped), crawler.spider)
+        # Linked from the same listing page but its save failed
+        failed = Request(OTHER_DETAIL_URL, meta={'agrn': '5678'})
+        dupefilter.request_seen(failed)
+        dupefilter.item_save_failed({'agrn_reference': 'AGRN-5678'}, crawler.spider)
+        dupefilter.item_scraped({'agrn_reference': 'AGRN-5678'},
+                                HtmlResponse(OTHER_DETAIL_URL, body=b'', request=failed), crawler.spider)
+        dupefilter.close('finished')
+
+        _, dupefilter = self.make_filter()
+        self.assertFalse(dupefilter.request_seen(Request(LISTING_URL)))
+        self.assertTrue(dupefilter.request_seen(self.detail_request()))
+        self.assertFalse(dupefilter.request_seen(Request(OTHER_DETAIL_URL, meta={'agrn': '5678'})))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+import unittest
+
+from scrapy.http import HtmlResponse, Request
+from twisted.internet.defer import Deferred
+from twisted.python.failure import Failure
+
+from disaster_scrapy.offload import ExtractionPool
+from disaster_scrapy.spiders.disasters import DisasterSpider
+
+
+class ManualPool(ExtractionPool):
+    """ExtractionPool whose worker results are fired by the test"""
+
+    def __init__(self, max_in_flight):
+        super().__init__(DisasterSpider, workers=1, max_in_flight=max_in_flight)
+        self.pending = {}
+
+    def _submit(self, url, body, encoding, meta):
+        self.submitted += 1
+        self.pending[url] = Deferred()
+        return self.pending[url]
+
+
+def page(n):
+    url = f'https://example.com/{n}'
+    return HtmlResponse(url, body=b'<html></html>', encoding='utf-8', request=Request(url))
+
+
+class ExtractionPoolOrderTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.pool = ManualPool(max_in_flight=2)
+        self.released = []
+
+    def tearDown(self):
+        self.pool.shutdown()
+
+    def extract(self, n):
+        d = self.pool.extract(page(n))
+        d.addCallbacks(self.released.append, lambda f: self.released.append(f.getErrorMessage()))
+
+    def test_records_released_in_submission_order(self):
+        for n in range(3):
+            self.extract(n)
+        self.assertEqual(self.pool.submitted, 2)
+
+        self.pool.pending['https://example.com/1'].callback('record 1')
+        self.assertEqual(self.released, [])
+        # Still holding its slot, so page 2 is not submitted past the slow page 0
+        self.assertEqual(self.pool.submitted, 2)
+
+        self.pool.pending['https://example.com/0'].callback('record 0')
+        self.assertEqual(self.released, ['record 0', 'record 1'])
+        self.assertEqual(self.pool.submitted, 3)
+
+        self.pool.pending['https://example.com/2'].callback('record 2')
+        self.assertEqual(self.released, ['record 0', 'record 1', 'record 2'])
+
+    def test_failure_keeps_its_place(self):
+        self.extract(0)
+        self.extract(1)
+
+        self.pool.pending['https://example.com/1'].callback('record 1')
+        self.pool.pending['https://example.com/0'].errback(Failure(ValueError('bad page')))
+        self.assertEqual(self.released, ['bad page', 'record 1'])
+
+        self.extract(2)
+        self.pool.pending['https://example.com/2'].callback('record 2')
+        self.assertEqual(self.released[-1], 'record 2')
+
+
+if __name__ == '__main__':
+    unittest.main()
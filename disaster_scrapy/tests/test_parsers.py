@@ -0,0 +1,48 @@
+import os
+import unittest
+
+from scrapy.http import HtmlResponse
+
+from disaster_scrapy.parsers import LxmlBackend, ParselBackend
+
+
+FIXTURE = os.path.join(os.path.dirname(__file__), '..', '..', 'disaster-html-structure.html')
+DETAIL_URL = 'https://www.disasterassist.gov.au/find-a-disaster/australian-disasters/1234'
+
+CP1252_PAGE = (
+    '<html><head><meta http-equiv="Content-Type" content="text/html; charset=windows-1252">'
+    '<title>Far North Queensland – Cyclone</title></head><body>'
+    '<h1>Tropical Cyclone Jasper ’ flooding</h1>'
+    '<div class="content-area"><ul><li>Cairns</li><li>Douglas</li><li>Mareeba</li></ul></div>'
+    '<p>Disaster Recovery Allowance – café owners</p>'
+    '<dl><dt>Start date</dt><dd>13 December 2023</dd></dl>'
+    '</body></html>'
+).encode('cp1252')
+
+
+class ParserBackendParityTestCase(unittest.TestCase):
+
+    def assert_backends_agree(self, body, **kwargs):
+        # Separate responses so parsel's cached selector is not shared
+        responses = [HtmlResponse(DETAIL_URL, body=body, **kwargs) for _ in range(2)]
+        expected = ParselBackend().extract_detail(responses[0])
+        self.assertEqual(LxmlBackend().extract_detail(responses[1]), expected)
+        return expected
+
+    def test_fixture_page(self):
+        with open(FIXTURE, 'rb') as f:
+            fields = self.assert_backends_agree(f.read(), encoding='utf-8')
+        self.assertTrue(fields['paragraphs'] or fields['list_items'])
+
+    def test_cp1252_meta_charset(self):
+        fields = self.assert_backends_agree(CP1252_PAGE)
+        self.assertEqual(fields['list_items'], ['Cairns', 'Douglas', 'Mareeba'])
+        self.assertEqual(fields['h1'], 'Tropical Cyclone Jasper ’ flooding')
+
+    def test_invalid_utf8_body(self):
+        # Declared UTF-8 but contains cp1252 bytes: lxml must fall back to Scrapy's decoding
+        self.assert_backends_agree(CP1252_PAGE.replace(b'windows-1252', b'utf-8'), encoding='utf-8')
+
+
+if __name__ == '__main__':
+    unittest.main()
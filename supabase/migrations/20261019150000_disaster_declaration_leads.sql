@@ -0,0 +1,31 @@
+-- AGRNs found on state emergency sites by the state_declarations spiders.
+-- A state page can cite old or unrelated AGRNs (news, archives), so these are
+-- kept out of disaster_declarations and never count towards telehealth
+-- eligibility. An AGRN is only active once the federal DisasterAssist crawl
+-- writes it to disaster_declarations.
+CREATE TABLE IF NOT EXISTS public.disaster_declaration_leads (
+  id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+  agrn_reference TEXT NOT NULL,
+  data_source TEXT NOT NULL,
+  source_system VARCHAR(50) NOT NULL,
+  state_code CHAR(3) NOT NULL,
+  event_name TEXT,
+  disaster_type disaster_type_enum NOT NULL DEFAULT 'other',
+  affected_areas JSONB,
+  description TEXT,
+  source_url TEXT,
+  first_seen_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+  last_seen_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+  UNIQUE (agrn_reference, data_source)
+);
+
+CREATE INDEX IF NOT EXISTS idx_disaster_declaration_leads_agrn
+ON public.disaster_declaration_leads (agrn_reference);
+
+-- Written by the scraper with the service role; readable by admins only
+ALTER TABLE public.disaster_declaration_leads ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Admins can read declaration leads"
+ON public.disaster_declaration_leads
+FOR SELECT
+USING (public.is_admin_user());